@@ -0,0 +1,76 @@
+"""
+SIP backtest library for crypto and stocks.
+
+Importing the package is cheap: the names below are loaded from their submodule on first
+access, and ccxt, yfinance, xlsxwriter, openpyxl and pyarrow are only imported once a fetch or write
+needs them.
+
+    import sipbacktest
+    outputs = sipbacktest.run('crypto', frequencies=['weekly'], formats=())
+    outputs['weekly']['dashboard']
+
+Command line: python -m sipbacktest --crypto --stocks (see sipbacktest.cli).
+"""
+import importlib
+
+# public name -> submodule that defines it
+_EXPORTS = {
+    # data sources
+    'OHLCVCache': 'sipbacktest.cache',
+    'fetch_crypto_daily': 'sipbacktest.sources',
+    'fetch_stocks_daily': 'sipbacktest.sources',
+    'fetch_ohlcv': 'sipbacktest.sources',
+    'fetch_ohlc': 'sipbacktest.sources',
+    'make_exchange': 'sipbacktest.sources',
+    'afetch_crypto': 'sipbacktest.acquire',
+    'afetch_stocks': 'sipbacktest.acquire',
+    'resample_ohlcv': 'sipbacktest.resample',
+    'RESAMPLE_RULES': 'sipbacktest.resample',
+    # SIP engine
+    'align_closes': 'sipbacktest.engine',
+    'sip_matrix': 'sipbacktest.engine',
+    'execute_buys': 'sipbacktest.execution',
+    'sip_backtest_all': 'sipbacktest.backtest',
+    'sip_backtest': 'sipbacktest.backtest',
+    'run_strategies': 'sipbacktest.strategies',
+    'strategy_pnl': 'sipbacktest.strategies',
+    'rolling_start_pnl': 'sipbacktest.rolling',
+    'entry_date_sensitivity': 'sipbacktest.rolling',
+    'sip_metrics': 'sipbacktest.metrics',
+    'explore_baskets': 'sipbacktest.baskets',
+    'simulate_fans': 'sipbacktest.montecarlo',
+    # dashboard
+    'summary_row': 'sipbacktest.dashboard',
+    'build_dashboard_rows': 'sipbacktest.dashboard',
+    'build_crypto_dashboard_rows': 'sipbacktest.dashboard',
+    'summary_banners': 'sipbacktest.dashboard',
+    # report writers and stores
+    'write_report': 'sipbacktest.report',
+    'write_sheet': 'sipbacktest.report',
+    'write_results': 'sipbacktest.store',
+    'load_results': 'sipbacktest.store',
+    'load_table': 'sipbacktest.store',
+    # runs
+    'ASSET_CLASSES': 'sipbacktest.pipeline',
+    'backtest_frequency': 'sipbacktest.pipeline',
+    'write_outputs': 'sipbacktest.pipeline',
+    'run': 'sipbacktest.pipeline',
+    'run_intraday': 'sipbacktest.intraday',
+    'RunStats': 'sipbacktest.telemetry',
+    'QueryService': 'sipbacktest.server',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,3 @@
+from sipbacktest.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sipbacktest import telemetry
+from sipbacktest.cache import atop_up
+
+# -----------------------------
+# Concurrent data acquisition
+# -----------------------------
+# Every symbol is fetched as its own task: a semaphore bounds how many run at once,
+# a per-host limiter spaces out requests to the same API, each network call is retried
+# with exponential backoff, and a failing symbol only lands in `errors` instead of
+# aborting the whole run.
+# afetch_crypto/afetch_stocks are the coroutines, for callers that already run an event loop;
+# fetch_crypto/fetch_stocks run them to completion from plain code, and from inside a running
+# loop (Jupyter, async apps) on a worker thread with a loop of its own.
+
+YAHOO_HOST = "query1.finance.yahoo.com"
+
+
+class HostRateLimiter:
+    """
+    Minimum spacing (seconds) between calls to the same host, shared by all tasks on the loop.
+    """
+
+    def __init__(self, intervals: dict = None, default: float = 0.0):
+        self.intervals = dict(intervals or {})
+        self.default = default
+        self._locks = {}
+        self._last = {}
+
+    async def wait(self, host: str):
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._last.get(host, 0.0) + self.intervals.get(host, self.default) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last[host] = time.monotonic()
+
+
+async def with_retry(call, retries: int = 3, backoff: float = 1.0):
+    """
+    Await call() and retry on any exception, sleeping backoff * 2**attempt (plus jitter) in between.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except Exception:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random() / 2))
+
+
+async def fetch_many(keys, fetch_one, concurrency: int = 8):
+    """
+    Run fetch_one(key) for every key with at most `concurrency` in flight.
+    Returns (results, errors): two dicts keyed like `keys`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def guarded(key):
+        async with semaphore:
+            try:
+                return key, await fetch_one(key), None
+            except Exception as e:
+                return key, None, e
+
+    done = await asyncio.gather(*(guarded(key) for key in keys))
+    results = {key: result for key, result, error in done if error is None}
+    errors = {key: error for key, result, error in done if error is not None}
+    return results, errors
+
+
+async def afetch_ohlcv_history(exchange, symbol: str, timeframe: str, since: int, limiter: HostRateLimiter,
+                               page_limit: int = 1000, retries: int = 3, backoff: float = 1.0) -> list:
+    """
+    Async counterpart of paginate.fetch_ohlcv_history for a ccxt.async_support exchange.
+    """
+    step = exchange.parse_timeframe(timeframe) * 1000
+    rows = []
+    cursor = since
+    while True:
+        async def call():
+            await limiter.wait(exchange.id)
+            return await exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+
+        page = await with_retry(call, retries, backoff)
+        fresh = [c for c in page if not rows or c[0] > rows[-1][0]]
+        if not fresh:
+            return rows
+        rows.extend(fresh)
+        cursor = rows[-1][0] + step
+
+
+def run_sync(coro):
+    """
+    Run coro to completion and return its result: with asyncio.run() when no event loop is running
+    in this thread, otherwise on a worker thread with its own loop (asyncio.run() refuses to nest).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+async def afetch_crypto(symbols: dict, timeframe: str, limit: int, cache=None, exchange=None,
+                        concurrency: int = 8, retries: int = 3, backoff: float = 1.0):
+    """
+    Fetch the last `limit` bars for every {name: market symbol} concurrently.
+    Uses ccxt.async_support.binance unless an (async) exchange object is passed in.
+    Returns (results, errors) with results as {name: [[ts, o, h, l, c, v], ...]}.
+    """
+    owned = exchange is None
+    if owned:
+        import ccxt.async_support as ccxt_async
+        exchange = ccxt_async.binance()
+    limiter = HostRateLimiter({exchange.id: getattr(exchange, 'rateLimit', 0) / 1000})
+    since = exchange.milliseconds() - limit * exchange.parse_timeframe(timeframe) * 1000
+
+    async def one(name):
+        symbol = symbols[name]
+
+        async def fetch_from(ts, cache_counter=None):
+            rows = await afetch_ohlcv_history(exchange, symbol, timeframe, ts, limiter,
+                                              retries=retries, backoff=backoff)
+            telemetry.fetched(name, rows)
+            if cache_counter:
+                telemetry.count(cache_counter, asset=name)
+            return rows
+
+        with telemetry.stage('fetch', asset=name):
+            if cache is None:
+                rows = await fetch_from(since)
+            else:
+                rows = await atop_up(
+                    cache, exchange.id, symbol, timeframe, limit,
+                    fetch_full=lambda: fetch_from(since, 'cache misses'),
+                    fetch_since=lambda ts: fetch_from(ts, 'cache hits')
+                )
+        return rows[-limit:]
+
+    try:
+        return await fetch_many(symbols, one, concurrency)
+    finally:
+        if owned:
+            await exchange.close()
+
+
+def fetch_crypto(symbols: dict, timeframe: str, limit: int, cache=None, exchange=None,
+                 concurrency: int = 8, retries: int = 3, backoff: float = 1.0):
+    """
+    Blocking afetch_crypto; safe to call from inside a running event loop.
+    """
+    return run_sync(afetch_crypto(symbols, timeframe, limit, cache, exchange, concurrency, retries, backoff))
+
+
+async def afetch_stocks(tickers, fetch, concurrency: int = 8, min_interval: float = 0.0,
+                        retries: int = 3, backoff: float = 1.0, host: str = YAHOO_HOST):
+    """
+    Run a blocking fetch(ticker) -> DataFrame (e.g. fetch_ohlc around yf.download) on a thread pool.
+    Returns (results, errors) keyed by ticker.
+    """
+    loop = asyncio.get_running_loop()
+    limiter = HostRateLimiter({host: min_interval})
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        async def one(ticker):
+            async def call():
+                await limiter.wait(host)
+                return await loop.run_in_executor(pool, fetch, ticker)
+            with telemetry.stage('fetch', asset=ticker):
+                return await with_retry(call, retries, backoff)
+
+        return await fetch_many(tickers, one, concurrency)
+
+
+def fetch_stocks(tickers, fetch, concurrency: int = 8, min_interval: float = 0.0,
+                 retries: int = 3, backoff: float = 1.0, host: str = YAHOO_HOST):
+    """
+    Blocking afetch_stocks; safe to call from inside a running event loop.
+    """
+    return run_sync(afetch_stocks(tickers, fetch, concurrency, min_interval, retries, backoff, host))
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from sipbacktest.engine import align_closes, asset_columns, sip_matrix
+from sipbacktest.execution import fill_prices, lot_steps
+from sipbacktest.report import PERCENT_FORMAT, SIGNED_PERCENT_FORMAT, UNITS_FORMAT
+
+# -----------------------------
+# Per-asset SIP frames
+# -----------------------------
+# The batched engine works on a (time x asset) close matrix; these helpers slice each
+# asset's columns back out next to its OHLCV bars, which is what the sheets and the
+# columnar store receive. Column names follow the asset class ('crypto' or 'shares').
+
+CRYPTO_PRICES = ('open', 'high', 'low', 'close')
+STOCK_PRICES = ("Open", "High", "Low", "Close")
+
+
+def start_arrays(names: list, start: dict) -> dict:
+    """
+    {name: {'close', 'cum_units', 'invested', 'cash'}} checkpoint entries -> per-asset arrays in
+    `names` order for sip_matrix; assets without an entry start from nothing, and entries
+    without 'cash' (frictionless runs) from no carried cash.
+    """
+    empty = {'close': np.nan, 'cum_units': 0.0, 'invested': 0.0, 'cash': 0.0}
+    return {key: np.array([(start.get(name) or empty).get(key, default) for name in names], dtype=np.float64)
+            for key, default in empty.items()}
+
+
+def sip_backtest_all(ohlc_frames: dict, sip_amount: float, prices: tuple = CRYPTO_PRICES,
+                     units: str = 'crypto', start: dict = None, execution: dict = None) -> dict:
+    """
+    Buy sip_amount of every asset at each bar's close in one batched pass.
+      prices: (open, high, low, close) column names; the last one is the buy price
+      units:  name used for the '<units>_bought' / 'cumulative_<units>' columns
+      start:  {name: {'close', 'cum_units', 'invested'}} to continue from a checkpoint
+      execution: fees/slippage/minimum-order config (see sipbacktest.execution); adds the
+              'cash' (carried, uninvested) and 'cumulative_fees' columns
+    Assets with an empty frame are left out of the result. Datetime indexes are reduced to dates.
+    """
+    index, names, close = align_closes(ohlc_frames, prices[-1])
+    orders = None
+    if execution:
+        ohlc = [close if column == prices[-1] else align_closes(ohlc_frames, column)[2] for column in prices]
+        orders = {'price': fill_prices(ohlc, execution), 'fee': execution.get('fee', 0.0),
+                  'min_notional': execution.get('min_notional', 0.0), 'lot_step': lot_steps(names, execution)}
+    result = sip_matrix(close, sip_amount, start_arrays(names, start) if start else None, execution=orders)
+    if orders:
+        result['fees'] = np.cumsum(result['fees'], axis=0)
+
+    frames = {}
+    for j, name in enumerate(names):
+        df = ohlc_frames[name].copy()
+        cols = asset_columns(result, j, index.get_indexer(df.index))
+        if isinstance(df.index, pd.DatetimeIndex):
+            df.index = pd.Index(df.index.date, name=df.index.name)  # Keep only date part
+
+        # Average price of the bar (for info) and percentage change of the close vs the previous bar
+        df['average'] = df[list(prices)].mean(axis=1)
+        df['percentage_change'] = cols['pct_change']
+
+        # Units bought each bar at the close, running totals and value at the close
+        df[f'{units}_bought'] = cols['units']
+        df[f'cumulative_{units}'] = cols['cum_units']
+        df['cumulative_investment'] = cols['invested']
+        df['portfolio_value'] = cols['value']
+        if orders:
+            df['cash'] = cols['cash']
+            df['cumulative_fees'] = cols['fees'] + ((start or {}).get(name) or {}).get('fees', 0.0)
+
+        # Portfolio percentage change (full precision; display rounding happens in sheet_frame/Excel)
+        df['portfolio_pct_change_value'] = cols['pnl_pct']
+        frames[name] = df
+
+    return frames
+
+
+def sip_backtest(df: pd.DataFrame, sip_amount: float, **kwargs) -> pd.DataFrame:
+    """
+    Single-asset convenience wrapper around sip_backtest_all.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    return sip_backtest_all({'asset': df}, sip_amount, **kwargs)['asset']
+
+
+def sheet_number_formats(units: str = 'crypto') -> dict:
+    """
+    Excel display formats per sheet column; every other float column shows 2 decimals.
+    """
+    return {
+        'percentage_change': PERCENT_FORMAT,
+        f'{units}_bought': UNITS_FORMAT,
+        f'cumulative_{units}': UNITS_FORMAT,
+        'portfolio_pct_change': SIGNED_PERCENT_FORMAT
+    }
+
+
+def sheet_frame(df: pd.DataFrame, pct_after_value: bool = False) -> pd.DataFrame:
+    """
+    Presentation view for Excel: portfolio_pct_change is the numeric P/L (%) shown as "+x.xx%",
+    placed just before (or after) portfolio_pct_change_value.
+    """
+    out = df.copy(deep=False)
+    position = out.columns.get_loc('portfolio_pct_change_value') + pct_after_value
+    out.insert(position, 'portfolio_pct_change', out['portfolio_pct_change_value'])
+    return out
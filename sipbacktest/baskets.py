@@ -0,0 +1,213 @@
+import argparse
+import heapq
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from sipbacktest.engine import align_closes
+from sipbacktest.metrics import column_metrics, sip_arrays
+from sipbacktest.resample import RESAMPLE_RULES, resample_ohlcv
+
+# -----------------------------
+# Basket explorer
+# -----------------------------
+# Scores k-asset baskets beyond the Dashboard's TOP-N prefixes. Every basket is a sum of
+# per-asset SIP vectors (value, buys, cash flows over time), precomputed once and shared
+# with the worker processes, so scoring a basket never builds a DataFrame:
+#   - P/L (%) needs only the final invested/value of each asset, so whole chunks of
+#     baskets are scored with a gather-and-sum and only the final picks get the time metrics;
+#   - XIRR / drawdown ranking sums the time vectors of each basket in the chunk.
+# Every k-subset is scored when there are at most max_combinations of them; above that a
+# beam search grows the best `beam` baskets of size k-1 by one asset at a time.
+
+RESULT_COLUMNS = ['Basket', 'Size', 'Total Invested ($)', 'Portfolio Value ($)', 'P/L ($)', 'P/L (%)',
+                  'XIRR (%)', 'Max Drawdown (%)', 'Longest Underwater (days)', 'Volatility (%)']
+
+# rank_by -> result column (higher is better for all three; drawdowns are negative)
+RANK_BY = {'pnl_pct': 'P/L (%)', 'xirr': 'XIRR (%)', 'drawdown': 'Max Drawdown (%)'}
+
+CHUNK_CELLS = 4_000_000  # time x basket x asset cells gathered per chunk (bounds worker memory)
+
+_shared = {}
+
+
+def _attach(shm_name: str, shape: tuple, days: np.ndarray):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    stacked = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _shared.update(shm=shm, value=stacked[0], buys=stacked[1], flows=stacked[2], days=days)
+    _shared.update(final_value=stacked[0][-1].copy(), invested=stacked[1].sum(axis=0))
+
+
+def _share_locally(arrays: dict):
+    # Same layout as _attach, for runs without worker processes
+    _shared.update(value=arrays['value'], buys=arrays['buys'], flows=arrays['flows'], days=arrays['days'])
+    _shared.update(final_value=arrays['value'][-1].copy(), invested=arrays['buys'].sum(axis=0))
+
+
+def _basket_metrics(combos: np.ndarray) -> dict:
+    value, buys, flows = (_shared[key][:, combos].sum(axis=2) for key in ('value', 'buys', 'flows'))
+    return column_metrics(value, buys, flows, _shared['days'])
+
+
+def _score_chunk(combos: np.ndarray, rank_by: str, top: int) -> list:
+    """
+    Best `top` baskets of the (basket x asset) index array, as result tuples.
+    """
+    value, invested = _shared['final_value'], _shared['invested']
+    basket_value, basket_invested = value[combos].sum(axis=1), invested[combos].sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pnl_pct = (basket_value - basket_invested) / basket_invested * 100
+
+    if rank_by == 'pnl_pct':
+        # Time metrics are filled in once for the final picks (see _with_metrics)
+        keep = np.argsort(np.nan_to_num(pnl_pct, nan=-np.inf))[::-1][:top]
+        combos = combos[keep]
+        metrics = {col: np.full(len(keep), np.nan) for col in RESULT_COLUMNS[6:]}
+    else:
+        metrics = _basket_metrics(combos)
+        keep = np.argsort(np.nan_to_num(metrics[RANK_BY[rank_by]], nan=-np.inf))[::-1][:top]
+        combos, metrics = combos[keep], {col: values[keep] for col, values in metrics.items()}
+
+    return [(tuple(combo), len(combo), basket_invested[i], basket_value[i], basket_value[i] - basket_invested[i],
+             pnl_pct[i], *(metrics[col][n] for col in RESULT_COLUMNS[6:]))
+            for n, (i, combo) in enumerate(zip(keep, combos.tolist()))]
+
+
+def _with_metrics(rows: list) -> list:
+    # Result tuples of one size with their time metrics computed
+    if not rows:
+        return rows
+    metrics = _basket_metrics(np.array([row[0] for row in rows], dtype=np.int64))
+    return [(*row[:6], *(metrics[col][n] for col in RESULT_COLUMNS[6:])) for n, row in enumerate(rows)]
+
+
+def _chunks(combos, size: int, chunk: int):
+    it = iter(combos)
+    while True:
+        block = list(itertools.islice(it, chunk))
+        if not block:
+            return
+        yield np.array(block, dtype=np.int64).reshape(len(block), size)
+
+
+def _best(results, rank_by: str, top: int) -> list:
+    column = RESULT_COLUMNS.index(RANK_BY[rank_by])
+    key = lambda row: -math.inf if not np.isfinite(row[column]) else row[column]
+    return heapq.nlargest(top, results, key=key)
+
+
+def _score_all(pool, combos, size: int, n_bars: int, rank_by: str, top: int) -> list:
+    chunk = max(1, CHUNK_CELLS // max(1, n_bars * size))
+    blocks = _chunks(combos, size, chunk)
+    if pool is None:
+        parts = (_score_chunk(block, rank_by, top) for block in blocks)
+    else:
+        parts = pool.map(_score_chunk, blocks, itertools.repeat(rank_by), itertools.repeat(top))
+    return _best(itertools.chain.from_iterable(parts), rank_by, top)
+
+
+def _beam_candidates(beam: list, n_assets: int):
+    # Every basket of the beam grown by one asset it does not hold yet, without duplicates
+    seen = set()
+    for row in beam:
+        basket = set(row[0])
+        for j in range(n_assets):
+            if j not in basket:
+                candidate = tuple(sorted(basket | {j}))
+                if candidate not in seen:
+                    seen.add(candidate)
+                    yield candidate
+
+
+def explore_baskets(index, names: list, close: np.ndarray, amount: float, sizes=(2, 3), rank_by: str = 'pnl_pct',
+                    top: int = 20, max_combinations: int = 1_000_000, beam: int = 200,
+                    workers: int = None) -> pd.DataFrame:
+    """
+    Best `top` baskets of each size in `sizes`, ranked by rank_by ('pnl_pct', 'xirr' or 'drawdown').
+    index, names and close are align_closes output; every asset buys `amount` per bar.
+    Sizes with more than max_combinations subsets use a beam search of width `beam`.
+    workers=1 scores in this process; otherwise chunks go to a process pool.
+    """
+    if rank_by not in RANK_BY:
+        raise ValueError(f"rank_by must be one of {sorted(RANK_BY)}")
+    n_assets = len(names)
+    sizes = [k for k in sizes if 1 <= k <= n_assets]
+    if not len(index) or not sizes:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    arrays = sip_arrays(index, close, amount)
+    stacked = np.stack([arrays['value'], arrays['buys'], arrays['flows']])
+    workers = workers or os.cpu_count()
+
+    shm = None
+    pool = None
+    try:
+        if workers > 1:
+            shm = shared_memory.SharedMemory(create=True, size=max(stacked.nbytes, 1))
+            np.ndarray(stacked.shape, dtype=np.float64, buffer=shm.buf)[:] = stacked
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                       initargs=(shm.name, stacked.shape, arrays['days']))
+        _share_locally(arrays)
+
+        rows = []
+        exhaustive = [k for k in sizes if math.comb(n_assets, k) <= max_combinations]
+        for k in exhaustive:
+            rows.append(_score_all(pool, itertools.combinations(range(n_assets), k), k, len(index), rank_by, top))
+
+        # Beam search for the sizes that are too large to enumerate
+        pruned = [k for k in sizes if k not in exhaustive]
+        if pruned:
+            level = _score_all(pool, itertools.combinations(range(n_assets), 1), 1, len(index), rank_by, beam)
+            for k in range(2, max(pruned) + 1):
+                level = _score_all(pool, _beam_candidates(level, n_assets), k, len(index), rank_by, beam)
+                if k in pruned:
+                    rows.append(_best(level, rank_by, top))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    if rank_by == 'pnl_pct':
+        rows = [_with_metrics(size_rows) for size_rows in rows]
+    df = pd.DataFrame(list(itertools.chain.from_iterable(rows)), columns=RESULT_COLUMNS)
+    df['Basket'] = df['Basket'].map(lambda combo: '+'.join(names[j] for j in combo))
+    return df.sort_values(['Size', RANK_BY[rank_by]], ascending=[True, False], ignore_index=True)
+
+
+def main(argv=None):
+    from sipbacktest.sweep import load_cached_daily
+
+    parser = argparse.ArgumentParser(description="Find the best SIP baskets over cached daily prices.")
+    parser.add_argument('--cache', default='data_cache/ohlcv.sqlite')
+    parser.add_argument('--source', default='binance', help="cache source key, e.g. binance or yahoo")
+    parser.add_argument('--symbols', nargs='+', required=True)
+    parser.add_argument('--frequency', default='daily', choices=list(RESAMPLE_RULES))
+    parser.add_argument('--amount', type=float, default=2.0, help="SIP per asset per bar")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[2, 3])
+    parser.add_argument('--rank-by', default='pnl_pct', choices=list(RANK_BY))
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--max-combinations', type=int, default=1_000_000,
+                        help="above this many subsets of a size, use the beam search")
+    parser.add_argument('--beam', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='best_baskets.csv')
+    args = parser.parse_args(argv)
+
+    frames = load_cached_daily(args.cache, args.source, args.symbols)
+    frames = {name: resample_ohlcv(df, RESAMPLE_RULES[args.frequency]) for name, df in frames.items()}
+    index, names, close = align_closes(frames, 'close')
+    best = explore_baskets(index, names, close, args.amount, sizes=args.sizes, rank_by=args.rank_by, top=args.top,
+                           max_combinations=args.max_combinations, beam=args.beam, workers=args.workers)
+    best.to_csv(args.out, index=False)
+    print(f"Saved {len(best)} baskets to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
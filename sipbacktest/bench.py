@@ -0,0 +1,354 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from sipbacktest.acquire import fetch_crypto, fetch_stocks
+from sipbacktest.backtest import sheet_frame, sheet_number_formats, sip_backtest_all
+from sipbacktest.dashboard import (DASHBOARD_NUMBER_FORMATS, add_metrics, basket_members, build_dashboard_rows,
+                                   summary_banners, summary_row)
+from sipbacktest.engine import align_closes
+from sipbacktest.metrics import sip_metrics
+from sipbacktest.paginate import iter_ohlcv_pages
+from sipbacktest.pipeline import ASSET_CLASSES
+from sipbacktest.report import write_report
+from sipbacktest.sources import STOCK_COLUMNS, fetch_ohlc, ohlcv_frame
+
+# -----------------------------
+# Benchmarks
+# -----------------------------
+# Offline, deterministic timings of each stage of a run, for catching performance regressions:
+#   fetch      the real fetch code (pagination, concurrency, frame building) against a fake
+#              ccxt exchange / yf.download serving synthetic bars
+#   compute    batched SIP frames (sip_backtest_all)
+#   dashboard  summary rows, TOTAL/TOP-N, risk metrics and banners
+#   xlsx       the workbook: column auto-fit, number formats, color scales, banners
+# Every (assets x bars) scenario is timed stage by stage, then re-run under tracemalloc for
+# each stage's peak Python/NumPy allocation (kept out of the timings, which it would slow
+# down). Synthetic bars depend only on (seed, symbol), so runs are comparable over time;
+# compare a results file against an earlier one with --baseline.
+# --check instead runs the pagination checks: paginate.iter_ohlcv_pages against StubExchange,
+# a synchronous stub that can overlap its pages, skip bars, cap page sizes and add latency.
+
+DAY_MS = 86_400_000
+LAST_BAR = datetime.datetime(2025, 1, 1)  # synthetic histories end here and run backwards
+# Daily bars reach back to pandas' earliest timestamp (1677-09-21) at this many bars
+MAX_DAILY_BARS = (LAST_BAR - pd.Timestamp.min.ceil('D').to_pydatetime()).days
+
+
+def synthetic_ohlcv(n_bars: int, seed: int, symbol: str, step_ms: int = DAY_MS) -> np.ndarray:
+    """
+    (n_bars x 6) [ts, open, high, low, close, volume] random-walk bars ending at LAST_BAR,
+    the same for the same (seed, symbol).
+    """
+    if n_bars * step_ms > MAX_DAILY_BARS * DAY_MS:
+        raise ValueError(f"{n_bars} bars of {step_ms} ms reach back before {pd.Timestamp.min.date()}")
+    rng = np.random.default_rng([seed, zlib.crc32(symbol.encode())])
+    volatility = rng.uniform(0.01, 0.05)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0002, volatility, n_bars)))
+    open_ = np.r_[100.0, close[:-1]]
+    wick = np.abs(rng.normal(0.0, volatility / 2, (2, n_bars)))
+    end = int(LAST_BAR.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000)
+    ts = end - step_ms * np.arange(n_bars - 1, -1, -1, dtype=np.float64)
+    return np.column_stack([ts, open_, np.maximum(open_, close) * (1 + wick[0]),
+                            np.minimum(open_, close) * (1 - wick[1]), close, rng.lognormal(10, 1, n_bars)])
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    # ccxt's parse_timeframe for the fake exchanges: '1d' -> 86400
+    return int(timeframe[:-1]) * {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}[timeframe[-1]]
+
+
+class FakeExchange:
+    """
+    ccxt.async_support-style exchange serving synthetic_ohlcv bars, for acquire.fetch_crypto.
+    """
+    id = 'bench'
+    rateLimit = 0
+
+    def __init__(self, n_bars: int, seed: int = 0):
+        self.n_bars, self.seed, self.bars = n_bars, seed, {}
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return timeframe_seconds(timeframe)
+
+    def milliseconds(self) -> int:
+        return int(LAST_BAR.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000) + DAY_MS - 1
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1d', since: int = None, limit: int = 1000):
+        step = self.parse_timeframe(timeframe) * 1000
+        if (symbol, step) not in self.bars:
+            self.bars[symbol, step] = synthetic_ohlcv(self.n_bars, self.seed, symbol, step)
+        bars = self.bars[symbol, step]
+        first = 0 if since is None else int(np.searchsorted(bars[:, 0], since))
+        await asyncio.sleep(0)
+        return bars[first:first + min(limit, 1000)].tolist()
+
+    async def close(self):
+        pass
+
+
+class StubExchange:
+    """
+    Synchronous ccxt-style exchange over fixed synthetic_ohlcv candles, for paginate.iter_ohlcv_pages.
+      cap:        most candles per page, whatever the requested limit
+      overlap:    pages start this many candles before the requested `since`
+      gaps:       (start, stop) candle positions left out, like exchange downtime
+      rate_limit: advertised rateLimit (ms); latency: seconds each call takes
+    Every call's `since` and start time are recorded in `calls`.
+    """
+    id = 'stub'
+
+    def __init__(self, n_bars: int, timeframe: str = '1d', cap: int = 1000, overlap: int = 0, gaps=(),
+                 rate_limit: int = 0, latency: float = 0.0, seed: int = 0):
+        bars = synthetic_ohlcv(n_bars, seed, 'STUB', timeframe_seconds(timeframe) * 1000)
+        keep = np.ones(n_bars, dtype=bool)
+        for start, stop in gaps:
+            keep[start:stop] = False
+        self.bars = bars[keep].tolist()
+        self.ts = bars[keep, 0]
+        self.cap, self.overlap, self.rateLimit, self.latency = cap, overlap, rate_limit, latency
+        self.calls = []
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return timeframe_seconds(timeframe)
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1d', since: int = None, limit: int = 1000):
+        self.calls.append((since, time.monotonic()))
+        time.sleep(self.latency)
+        first = 0 if since is None else max(int(np.searchsorted(self.ts, since)) - self.overlap, 0)
+        return self.bars[first:first + min(limit, self.cap)]
+
+
+def check_pagination(n_bars: int = 5500, page_limit: int = 1000):
+    """
+    Check paginate.iter_ohlcv_pages against StubExchange, with and without prefetch: overlapping
+    pages, gaps (one longer than a page), pages shorter than page_limit, the inclusive `until`
+    end cursor, rate limiting and prefetch overlapping the caller's work. Raises AssertionError
+    on the first failure.
+    """
+    def fetch(exchange, until=None, prefetch=True, work=0.0):
+        rows = []
+        for page in iter_ohlcv_pages(exchange, 'STUB', '1d', int(exchange.ts[0]) - DAY_MS, until=until,
+                                     page_limit=page_limit, prefetch=prefetch):
+            rows += page
+            time.sleep(work)
+        return rows
+
+    for prefetch in (False, True):
+        for case, options in [('plain', {}), ('overlap', {'overlap': 3}), ('short pages', {'cap': 700}),
+                              ('gaps', {'gaps': [(1200, 1210), (2000, 2000 + 2 * page_limit)]})]:
+            exchange = StubExchange(n_bars, **options)
+            rows = fetch(exchange, prefetch=prefetch)
+            assert rows == exchange.bars, f"{case} (prefetch={prefetch}): {len(rows)} of {len(exchange.bars)} candles"
+
+        exchange = StubExchange(n_bars)
+        until = int(exchange.ts[2345])
+        rows = fetch(exchange, until=until, prefetch=prefetch)
+        assert rows == exchange.bars[:2346], f"until (prefetch={prefetch}): {len(rows)} candles, last {rows[-1][0]}"
+        assert max(since for since, _ in exchange.calls) <= until, f"requested past until (prefetch={prefetch})"
+
+        exchange = StubExchange(n_bars, rate_limit=20)
+        fetch(exchange, prefetch=prefetch)
+        starts = [start for _, start in exchange.calls]
+        assert min(np.diff(starts)) >= 0.019, f"rate limit (prefetch={prefetch}): calls {min(np.diff(starts)):.3f}s apart"
+
+    # With prefetch, each page's request runs while the caller is still on the previous page
+    timings = {}
+    for prefetch in (False, True):
+        start = time.perf_counter()
+        fetch(StubExchange(n_bars, latency=0.03), prefetch=prefetch, work=0.03)
+        timings[prefetch] = time.perf_counter() - start
+    assert timings[True] < 0.8 * timings[False], f"prefetch {timings[True]:.2f}s vs {timings[False]:.2f}s without"
+
+
+def fake_download(n_bars: int, seed: int = 0):
+    """
+    yf.download stand-in for sources.fetch_ohlc: the synthetic_ohlcv daily bars, indexed by date.
+    """
+    def download(ticker, interval='1d', period=None, start=None, auto_adjust=False, progress=False):
+        bars = synthetic_ohlcv(n_bars, seed, ticker)
+        dates = pd.DatetimeIndex(pd.to_datetime(bars[:, 0], unit='ms'), name='Date')
+        df = pd.DataFrame(bars[:, 1:], index=dates, columns=STOCK_COLUMNS)
+        return df[df.index >= pd.Timestamp(start)] if start is not None else df
+    return download
+
+
+def measure(stage, memory: bool = True) -> dict:
+    """
+    Run stage() once timed and, with memory=True, once more under tracemalloc.
+    Returns {'result', 'seconds', 'peak_mb'}.
+    """
+    start = time.perf_counter()
+    result = stage()
+    seconds = time.perf_counter() - start
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            stage()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return {'result': result, 'seconds': seconds, 'peak_mb': peak_mb}
+
+
+def run_scenario(n_assets: int, n_bars: int, asset_class: str = 'crypto', seed: int = 0, memory: bool = True,
+                 xlsx: bool = True, out_dir: str = None) -> list:
+    """
+    Time every stage for n_assets synthetic assets of n_bars daily bars; one record per stage.
+    Raises RuntimeError when any asset fails to fetch, so no stage is timed over missing assets.
+    """
+    config = ASSET_CLASSES[asset_class]
+    label, units, prices = config['label'], config['units'], config['columns'][:4]
+    names = [f'A{i:04d}' for i in range(n_assets)]
+    amount = 20.0 / n_assets
+
+    def fetch():
+        if asset_class == 'crypto':
+            rows, errors = fetch_crypto({name: f'{name}/USDT' for name in names}, '1d', n_bars,
+                                        exchange=FakeExchange(n_bars, seed), retries=0)
+            frames = {name: ohlcv_frame(rows[name]) for name in rows}
+        else:
+            download = fake_download(n_bars, seed)
+            frames, errors = fetch_stocks(names, lambda ticker: fetch_ohlc(ticker, '1d', 'max', download=download),
+                                          retries=0)
+        if errors:
+            name, error = next(iter(errors.items()))
+            raise RuntimeError(f"fetch failed for {len(errors)} of {n_assets} assets, e.g. {name}: {error!r}")
+        return frames
+
+    records = []
+    stage = measure(fetch, memory)
+    records.append(('fetch', stage))
+    frames = stage['result']
+
+    stage = measure(lambda: sip_backtest_all(frames, amount, prices=prices, units=units), memory)
+    records.append(('compute', stage))
+    results = stage['result']
+
+    def dashboard():
+        rows = [summary_row(label, name, results.get(name)) for name in names]
+        dashboard_df = build_dashboard_rows(rows, label_col=label, rank_top_n=config['rank_top_n'])
+        index, aligned, close = align_closes(frames, prices[-1])
+        baskets = basket_members(rows, label, config['rank_top_n'])
+        dashboard_df = add_metrics(dashboard_df, sip_metrics(index, aligned, close, amount, baskets), label)
+        return dashboard_df, summary_banners(dashboard_df, label, config['banner_titles'])
+    stage = measure(dashboard, memory)
+    records.append(('dashboard', stage))
+    dashboard_df, banners = stage['result']
+
+    if xlsx:
+        with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+            path = os.path.join(tmp, 'bench.xlsx')
+            sheets = {name: sheet_frame(df, config['pct_after_value']) for name, df in results.items()}
+            records.append(('xlsx', measure(lambda: write_report(
+                path, sheets, dashboard_df, label, banners=banners, max_width=config['max_width'],
+                number_formats=sheet_number_formats(units), dashboard_formats=DASHBOARD_NUMBER_FORMATS), memory)))
+
+    return [{'asset_class': asset_class, 'assets': n_assets, 'bars': n_bars, 'stage': name,
+             'seconds': round(stage['seconds'], 6),
+             'peak_mb': None if stage['peak_mb'] is None else round(stage['peak_mb'], 3)}
+            for name, stage in records]
+
+
+def environment() -> dict:
+    """
+    Versions and machine details stored next to the results.
+    """
+    import openpyxl
+    import xlsxwriter
+
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'openpyxl': openpyxl.__version__, 'xlsxwriter': xlsxwriter.__version__, 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'created': datetime.datetime.now().isoformat(timespec='seconds')}
+
+
+def compare(results: list, baseline: list, tolerance: float = 1.25) -> list:
+    """
+    Records of `results` that are slower than the same (asset_class, assets, bars, stage) of
+    `baseline` by more than `tolerance` times, with the ratio.
+    """
+    key = lambda r: (r['asset_class'], r['assets'], r['bars'], r['stage'])
+    before = {key(r): r for r in baseline}
+    slower = []
+    for record in results:
+        old = before.get(key(record))
+        if old and old['seconds'] > 0 and record['seconds'] / old['seconds'] > tolerance:
+            slower.append({**record, 'baseline_seconds': old['seconds'],
+                           'ratio': round(record['seconds'] / old['seconds'], 3)})
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline stage benchmarks on synthetic OHLCV.")
+    parser.add_argument('--assets', nargs='+', type=int, default=[10, 100, 1000])
+    parser.add_argument('--bars', nargs='+', type=int, default=[1000, 100_000])
+    parser.add_argument('--asset-class', default='crypto', choices=list(ASSET_CLASSES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-cells', type=int, default=10_000_000,
+                        help="skip scenarios with more assets x bars than this (100 x 100k peaks near 4 GB)")
+    parser.add_argument('--max-xlsx-cells', type=int, default=200_000,
+                        help="skip the xlsx stage above this many assets x bars")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument('--check', action='store_true', help="run the pagination checks instead of the benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        check_pagination()
+        print("Pagination checks passed")
+        return 0
+
+    results, skipped, failed = [], [], []
+    for n_assets in args.assets:
+        for n_bars in args.bars:
+            if n_assets * n_bars > args.max_cells:
+                skipped.append({'assets': n_assets, 'bars': n_bars, 'reason': f'over --max-cells {args.max_cells}'})
+                print(f"{n_assets} assets x {n_bars} bars: skipped (--max-cells)")
+                continue
+            try:
+                records = run_scenario(n_assets, n_bars, args.asset_class, args.seed, memory=not args.no_memory,
+                                       xlsx=n_assets * n_bars <= args.max_xlsx_cells)
+            except Exception as e:
+                failed.append({'assets': n_assets, 'bars': n_bars, 'error': repr(e)})
+                print(f"{n_assets} assets x {n_bars} bars: FAILED {e!r}")
+                continue
+            for r in records:
+                peak = '' if r['peak_mb'] is None else f"  peak {r['peak_mb']:.1f} MB"
+                print(f"{n_assets} assets x {n_bars} bars  {r['stage']:<9} {r['seconds']:8.3f}s{peak}")
+            results += records
+
+    with open(args.out, 'w') as f:
+        json.dump({'environment': environment(), 'seed': args.seed, 'results': results, 'skipped': skipped,
+                   'failed': failed}, f, indent=1)
+    print(f"Saved {len(results)} timings to {args.out}")
+    if skipped:
+        print("Not run (raise --max-cells to include): "
+              + ', '.join(f"{s['assets']} assets x {s['bars']} bars" for s in skipped))
+    if failed:
+        print("Failed: " + ', '.join(f"{f['assets']} assets x {f['bars']} bars" for f in failed))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = compare(results, json.load(f)['results'], args.tolerance)
+        for r in slower:
+            print(f"SLOWER {r['assets']} assets x {r['bars']} bars {r['stage']}: "
+                  f"{r['baseline_seconds']:.3f}s -> {r['seconds']:.3f}s ({r['ratio']}x)")
+        return 1 if slower or failed else 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
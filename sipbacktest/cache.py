@@ -0,0 +1,156 @@
+import asyncio
+import os
+import sqlite3
+
+# -----------------------------
+# On-disk OHLCV cache (SQLite)
+# -----------------------------
+# Bars are keyed by (source, symbol, timeframe, ts) where ts is the bar open time
+# in epoch milliseconds. A small meta table remembers how deep the history was
+# when it was first pulled, so later runs only need to top up the newest bars.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ohlcv (
+    source    TEXT    NOT NULL,
+    symbol    TEXT    NOT NULL,
+    timeframe TEXT    NOT NULL,
+    ts        INTEGER NOT NULL,
+    open      REAL,
+    high      REAL,
+    low       REAL,
+    close     REAL,
+    volume    REAL,
+    PRIMARY KEY (source, symbol, timeframe, ts)
+);
+CREATE TABLE IF NOT EXISTS ohlcv_meta (
+    source    TEXT    NOT NULL,
+    symbol    TEXT    NOT NULL,
+    timeframe TEXT    NOT NULL,
+    depth     INTEGER NOT NULL,
+    PRIMARY KEY (source, symbol, timeframe)
+);
+"""
+
+
+class OHLCVCache:
+    """
+    Persistent OHLCV store. Rows go in and out as [ts, open, high, low, close, volume]
+    lists, the same shape ccxt's fetch_ohlcv returns.
+    A new connection is opened per call so the cache can be shared across threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, source: str, symbol: str, timeframe: str, since: int = None) -> list:
+        query = ("SELECT ts, open, high, low, close, volume FROM ohlcv "
+                 "WHERE source = ? AND symbol = ? AND timeframe = ?")
+        params = [source, symbol, timeframe]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        query += " ORDER BY ts"
+        conn = self._connect()
+        try:
+            return [list(r) for r in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def last_timestamp(self, source: str, symbol: str, timeframe: str):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM ohlcv WHERE source = ? AND symbol = ? AND timeframe = ?",
+                (source, symbol, timeframe)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0]
+
+    def depth(self, source: str, symbol: str, timeframe: str) -> int:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT depth FROM ohlcv_meta WHERE source = ? AND symbol = ? AND timeframe = ?",
+                (source, symbol, timeframe)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else 0
+
+    def series(self) -> list:
+        """
+        Every cached series as (source, symbol, timeframe, bars, first ts, last ts) tuples.
+        """
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT source, symbol, timeframe, COUNT(*), MIN(ts), MAX(ts) FROM ohlcv "
+                "GROUP BY source, symbol, timeframe ORDER BY source, symbol, timeframe"
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def merge(self, source: str, symbol: str, timeframe: str, rows: list, depth: int = None):
+        """
+        Upsert rows (newer values win on the same ts) and optionally raise the recorded depth.
+        Everything happens in one transaction, so readers never see a half-merged series.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ohlcv VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(source, symbol, timeframe, int(r[0]), *[None if v is None else float(v) for v in r[1:6]])
+                     for r in rows]
+                )
+                if depth is not None:
+                    conn.execute(
+                        "INSERT INTO ohlcv_meta VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (source, symbol, timeframe) DO UPDATE SET depth = MAX(depth, excluded.depth)",
+                        (source, symbol, timeframe, int(depth))
+                    )
+        finally:
+            conn.close()
+
+
+def top_up(cache: OHLCVCache, source: str, symbol: str, timeframe: str, depth: int,
+           fetch_full, fetch_since) -> list:
+    """
+    Return the cached series for (source, symbol, timeframe) after bringing it up to date.
+
+    fetch_full()        -> rows for the whole requested history (used on a cold or too-shallow cache)
+    fetch_since(ts)     -> rows from ts onwards (ts is the last cached bar, which is re-fetched
+                           because it may still have been forming when it was stored)
+    """
+    last_ts = cache.last_timestamp(source, symbol, timeframe)
+    if last_ts is None or cache.depth(source, symbol, timeframe) < depth:
+        rows = fetch_full()
+    else:
+        rows = fetch_since(last_ts)
+    cache.merge(source, symbol, timeframe, rows, depth=depth)
+    return cache.load(source, symbol, timeframe)
+
+
+async def atop_up(cache: OHLCVCache, source: str, symbol: str, timeframe: str, depth: int,
+                  fetch_full, fetch_since) -> list:
+    """
+    Async twin of top_up: fetch_full/fetch_since are coroutine functions and the SQLite
+    work runs in a worker thread so it never blocks the event loop.
+    """
+    last_ts = await asyncio.to_thread(cache.last_timestamp, source, symbol, timeframe)
+    cached_depth = await asyncio.to_thread(cache.depth, source, symbol, timeframe)
+    if last_ts is None or cached_depth < depth:
+        rows = await fetch_full()
+    else:
+        rows = await fetch_since(last_ts)
+    await asyncio.to_thread(cache.merge, source, symbol, timeframe, rows, depth)
+    return await asyncio.to_thread(cache.load, source, symbol, timeframe)
@@ -0,0 +1,131 @@
+import argparse
+import contextlib
+import os
+import warnings
+
+# -----------------------------
+# Command line
+# -----------------------------
+# python -m sipbacktest --crypto [NAME ...] --stocks [TICKER ...] [options]
+# python -m sipbacktest --crypto --formats parquet --update   (daily refresh of a stored run)
+# Only argparse is imported up front; pandas and the data/report backends load once a run starts.
+
+FREQUENCY_NAMES = ('daily', 'weekly', 'monthly')
+QUOTE = 'USDT'  # quote currency for crypto names given without a pair
+
+
+def crypto_symbols(names: list) -> dict:
+    """
+    ['BTC', 'ETH/BTC'] -> {'BTC': 'BTC/USDT', 'ETH': 'ETH/BTC'}
+    """
+    return {name.split('/')[0]: name if '/' in name else f'{name}/{QUOTE}' for name in names}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m sipbacktest',
+                                     description="Backtest SIP buys on crypto and/or stocks.")
+    parser.add_argument('--crypto', nargs='*', metavar='NAME',
+                        help="run the crypto backtest; optional names (BTC or BTC/USDT), default list otherwise")
+    parser.add_argument('--stocks', nargs='*', metavar='TICKER',
+                        help="run the stocks backtest; optional tickers, default list otherwise")
+    parser.add_argument('--amount', type=float, default=None,
+                        help="total invested per buy, split equally across the symbols (default 20)")
+    parser.add_argument('--frequencies', nargs='+', default=list(FREQUENCY_NAMES), choices=FREQUENCY_NAMES)
+    parser.add_argument('--days', type=int, default=None, help="crypto history in days (default 1000)")
+    parser.add_argument('--period', default=None, help="stocks history as a yfinance period (default 3y)")
+    parser.add_argument('--formats', nargs='+', default=['xlsx'], choices=['xlsx', 'parquet', 'arrow', 'csv'])
+    parser.add_argument('--cache', default='data_cache/ohlcv.sqlite', help="SQLite OHLCV cache file")
+    parser.add_argument('--no-cache', action='store_true', help="always fetch the full history")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--min-interval', type=float, default=None, metavar='SECONDS',
+                        help="minimum spacing between Yahoo downloads (default 0.5)")
+    parser.add_argument('--no-streaming', action='store_true', help="build workbooks in memory instead of streaming")
+    parser.add_argument('--update', action='store_true',
+                        help="append only bars newer than the stored checkpoint (needs parquet, arrow or csv)")
+    parser.add_argument('--out-dir', default=None, help="output folder (default results_crypto / results_stocks)")
+    parser.add_argument('--execution', action='store_true',
+                        help="apply exchange fees, slippage and minimum orders (Binance spot defaults; "
+                             "cash below the minimum is carried to later buys)")
+    parser.add_argument('--fee', type=float, default=None, help="fee as a fraction of the notional (default 0.001)")
+    parser.add_argument('--slippage-bps', type=float, default=None, help="fill above the reference price (default 5)")
+    parser.add_argument('--min-notional', type=float, default=None, help="smallest accepted order (default 5)")
+    parser.add_argument('--lot-step', type=float, default=None, help="round units down to this step (default 0: none)")
+    parser.add_argument('--fill-price', default=None, choices=['open', 'high', 'low', 'close', 'average'],
+                        help="reference price of each buy (default close)")
+    parser.add_argument('--strategies', nargs='*', default=None, metavar='RULE',
+                        help="contribution rules to compare on the Dashboard (constant, buy_the_dip, drawdown_scaled, "
+                             "value_averaging); none to leave them out; default value averaging, buy the dip and "
+                             "drawdown scaled")
+    parser.add_argument('--monte-carlo', type=int, nargs='?', const=10_000, default=None, metavar='PATHS',
+                        help="add bootstrapped forward P/L%% fans (default 10000 paths per asset)")
+    parser.add_argument('--horizon-days', type=int, default=365, help="Monte Carlo horizon in calendar days")
+    parser.add_argument('--block', type=int, default=20, help="Monte Carlo bootstrap block length in bars")
+    parser.add_argument('--seed', type=int, default=0, help="Monte Carlo seed")
+    parser.add_argument('--workers', type=int, default=None, help="Monte Carlo worker processes (default: all cores)")
+    parser.add_argument('--stats', action='store_true',
+                        help="record stage timings, bars/bytes fetched, cache hits and peak memory: a 'Run Stats' "
+                             "sheet in each workbook and <out-dir>/run_stats_<time>.json/.csv")
+    parser.add_argument('--profile', default=None, metavar='FILE',
+                        help="run under cProfile, dump the stats to FILE and print the hot spots "
+                             "(e.g. with --crypto BTC --frequencies daily for one asset)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.crypto is None and args.stocks is None:
+        parser.error("pick at least one of --crypto / --stocks")
+    if args.crypto is not None and args.stocks is not None and args.out_dir:
+        parser.error("--out-dir needs a single asset class")
+    if args.update and set(args.formats) == {'xlsx'}:
+        parser.error("--update appends to a columnar store: add parquet, arrow or csv to --formats")
+
+    from sipbacktest import telemetry
+    from sipbacktest.pipeline import ASSET_CLASSES, TOTAL_SIP_PER_PERIOD, run
+    from sipbacktest.strategies import DEFAULT_STRATEGIES, RULES
+
+    strategies = DEFAULT_STRATEGIES
+    if args.strategies is not None:
+        unknown = sorted(set(args.strategies) - set(RULES))
+        if unknown:
+            parser.error(f"unknown strategies {unknown}; pick from {sorted(RULES)}")
+        defaults = {spec['rule']: spec for spec in DEFAULT_STRATEGIES}
+        strategies = [defaults.get(rule, {'name': rule.replace('_', ' ').title(), 'rule': rule})
+                      for rule in args.strategies]
+
+    execution = None
+    overrides = {'fee': args.fee, 'slippage_bps': args.slippage_bps, 'min_notional': args.min_notional,
+                 'lot_step': args.lot_step, 'price': args.fill_price}
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    if args.execution or overrides:
+        from sipbacktest.execution import BINANCE_SPOT
+        execution = {**BINANCE_SPOT, **overrides}
+
+    monte_carlo = None
+    if args.monte_carlo:
+        monte_carlo = {'n_paths': args.monte_carlo, 'horizon_days': args.horizon_days, 'block': args.block,
+                       'seed': args.seed, 'workers': args.workers}
+
+    jobs = []
+    if args.crypto is not None:
+        jobs.append(('crypto', crypto_symbols(args.crypto) if args.crypto else None, args.days))
+    if args.stocks is not None:
+        warnings.filterwarnings("ignore")  # yfinance/pandas deprecation noise
+        stocks = {ticker: ASSET_CLASSES['stocks']['symbols'].get(ticker, ticker) for ticker in args.stocks}
+        jobs.append(('stocks', stocks or None, args.period))
+
+    with telemetry.profiled(args.profile) if args.profile else contextlib.nullcontext():
+        for asset_class, symbols, history in jobs:
+            stats = telemetry.RunStats() if args.stats else None
+            run(asset_class, symbols=symbols,
+                total_amount=TOTAL_SIP_PER_PERIOD if args.amount is None else args.amount,
+                frequencies=args.frequencies, history=history, formats=args.formats,
+                cache_file=None if args.no_cache else args.cache, concurrency=args.concurrency,
+                streaming=not args.no_streaming, out_dir=args.out_dir, update=args.update, monte_carlo=monte_carlo,
+                strategies=strategies, execution=execution, stats=stats, min_interval=args.min_interval)
+            if stats is not None:
+                out_dir = args.out_dir or ASSET_CLASSES[asset_class]['out_dir']
+                for path in stats.write_log(os.path.join(out_dir, f"run_stats_{stats.started:%Y%m%d_%H%M%S}")):
+                    print(f"Saved {path}")
+    return 0
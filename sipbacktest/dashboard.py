@@ -0,0 +1,122 @@
+import pandas as pd
+
+from sipbacktest.report import INTEGER_FORMAT, best_performers
+
+# -----------------------------
+# Dashboard
+# -----------------------------
+# One summary row per asset (taken from the last bar of its SIP frame), then a TOTAL row,
+# a blank separator row and TOP-N basket rows. Risk/return columns (sipbacktest.metrics)
+# are joined on by label, for the baskets as well as the assets.
+
+SUMMARY_COLUMNS = ['Start Date', 'End Date', 'Total Invested ($)', 'Portfolio Value ($)', 'P/L ($)', 'P/L (%)']
+
+# Excel display formats for Dashboard columns that are not 2-decimal amounts
+DASHBOARD_NUMBER_FORMATS = {'Longest Underwater (days)': INTEGER_FORMAT}
+
+
+def summary_row(label_col: str, name: str, df: pd.DataFrame) -> dict:
+    """
+    Dashboard row for one asset's SIP frame; a zero row when df is None or empty.
+    """
+    if df is None or df.empty:
+        # still record a minimal row with zeros to keep dashboard consistent
+        return {label_col: name, 'Start Date': '', 'End Date': '', 'Total Invested ($)': 0.0,
+                'Portfolio Value ($)': 0.0, 'P/L ($)': 0.0, 'P/L (%)': 0.0}
+    last = df.iloc[-1]
+    return {
+        label_col: name,
+        'Start Date': df.index[0],
+        'End Date': df.index[-1],
+        'Total Invested ($)': float(last['cumulative_investment']),
+        'Portfolio Value ($)': float(last['portfolio_value']),
+        'P/L ($)': float(last['portfolio_value'] - last['cumulative_investment']),
+        'P/L (%)': float(last['portfolio_pct_change_value'])
+    }
+
+
+def basket_row(label_col: str, label: str, rows: pd.DataFrame) -> dict:
+    """
+    Aggregate of several summary rows (TOTAL, TOP n): sums, and P/L (%) on the summed amounts.
+    """
+    invested = rows['Total Invested ($)'].sum()
+    value = rows['Portfolio Value ($)'].sum()
+    return {
+        label_col: label,
+        'Start Date': '',
+        'End Date': '',
+        'Total Invested ($)': invested,
+        'Portfolio Value ($)': value,
+        'P/L ($)': rows['P/L ($)'].sum(),
+        'P/L (%)': (value - invested) / max(invested, 1e-12) * 100
+    }
+
+
+def basket_members(per_asset: list, label_col: str = 'Stock', rank_top_n: bool = True) -> dict:
+    """
+    {'TOTAL': every asset, 'TOP 1': [...], 'TOP 2': [...], ...} for the per_asset rows.
+    TOP n is the n best assets by P/L (%) when rank_top_n, otherwise the first n in list order.
+    """
+    names = [row[label_col] for row in per_asset]
+    ranked = names
+    if rank_top_n:
+        pnl = [row['P/L (%)'] for row in per_asset]
+        ranked = [names[i] for i in sorted(range(len(names)), key=lambda i: pnl[i], reverse=True)]
+    return {'TOTAL': names, **{f'TOP {n}': ranked[:n] for n in range(1, len(ranked) + 1)}}
+
+
+def build_dashboard_rows(per_asset: list, label_col: str = 'Stock', rank_top_n: bool = True) -> pd.DataFrame:
+    """
+    per_asset is a list of dicts like:
+      {'Stock': 'AAPL', 'Start Date': ..., 'End Date': ..., 'Total Invested ($)': ..., 'Portfolio Value ($)': ..., 'P/L ($)': ..., 'P/L (%)': ...}
+    Returns summary_df with TOTAL, blank row, and TOP-N appended (see basket_members).
+    """
+    summary_df = pd.DataFrame(per_asset, columns=[label_col, *SUMMARY_COLUMNS])
+    baskets = basket_members(per_asset, label_col, rank_top_n)
+    rows = summary_df.set_index(summary_df[label_col])
+
+    # TOTAL row
+    summary_df = pd.concat([summary_df, pd.DataFrame([basket_row(label_col, 'TOTAL', summary_df)])],
+                           ignore_index=True)
+
+    # TOP-N
+    topn_rows = [basket_row(label_col, label, rows.loc[members])
+                 for label, members in baskets.items() if label != 'TOTAL']
+
+    # blank row between TOTAL and TOP-N
+    empty_row = pd.DataFrame([{col: "" for col in summary_df.columns}])
+    return pd.concat([summary_df, empty_row, pd.DataFrame(topn_rows)], ignore_index=True)
+
+
+def add_metrics(dashboard_df: pd.DataFrame, metrics_df: pd.DataFrame, label_col: str = 'Stock') -> pd.DataFrame:
+    """
+    Append the metrics_df columns (indexed by asset name / basket label) to the Dashboard rows;
+    rows without metrics, like the blank separator, stay empty.
+    """
+    out = dashboard_df.copy()
+    for col in metrics_df.columns:
+        out[col] = out[label_col].map(metrics_df[col])
+    return out
+
+
+def build_crypto_dashboard_rows(per_asset: list) -> pd.DataFrame:
+    """
+    build_dashboard_rows for the crypto report: 'Crypto' labels, TOP n in CRYPTO_LIST order.
+    """
+    return build_dashboard_rows(per_asset, label_col='Crypto', rank_top_n=False)
+
+
+def summary_banners(dashboard_df: pd.DataFrame, label_col: str = 'Stock',
+                    titles: tuple = ('Best Stock Performer', 'Best TopN Portfolio')) -> list:
+    """
+    Text for the two merged yellow banners under the Dashboard:
+      1) Best individual performer
+      2) Best TopN performer
+    """
+    best_asset, best_topn = best_performers(dashboard_df, label_col)
+    banners = []
+    if best_asset:
+        banners.append(f"{titles[0]}: {best_asset[0]} with {best_asset[1]:.2f}% P/L")
+    if best_topn:
+        banners.append(f"{titles[1]}: {best_topn[0]} with {best_topn[1]:.2f}% P/L")
+    return banners
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from sipbacktest.execution import execute_buys
+
+# -----------------------------
+# Vectorized multi-asset SIP engine
+# -----------------------------
+# All assets are aligned on one time axis as a (time x asset) close matrix. Bars where an
+# asset has no price yet (e.g. listed later than the others) are NaN and masked out: no
+# buy, no investment, no value. Every output is a single (time x asset) float64 array.
+
+
+def align_closes(frames: dict, column: str = "close"):
+    """
+    {name: OHLCV DataFrame} -> (index, names, close) where close is a float64 (time x asset)
+    matrix on the union of all indexes, NaN where an asset has no bar.
+    """
+    frames = {name: df for name, df in frames.items() if not df.empty}
+    if not frames:
+        return pd.Index([]), [], np.empty((0, 0))
+    aligned = pd.concat({name: df[column] for name, df in frames.items()}, axis=1, sort=True)
+    return aligned.index, list(aligned.columns), aligned.to_numpy(dtype=np.float64)
+
+
+def sip_matrix(close: np.ndarray, amount: float, start: dict = None, execution: dict = None) -> dict:
+    """
+    Buy `amount` of every asset at every available close, for all assets in one pass.
+    amount is a constant, or a (time x asset) array of contributions (see sipbacktest.strategies).
+    Returns a dict of (time x asset) arrays:
+      pct_change, units, cum_units, invested, value, pnl_pct
+    start continues an earlier run from its checkpointed state, as per-asset arrays
+    {'close': last close, 'cum_units': ..., 'invested': ...}; the running totals start from
+    those and each asset's first bar is compared against start['close'].
+    execution routes the buys through execution.execute_buys, as
+    {'price': (time x asset) fill prices, 'fee', 'min_notional', 'lot_step'}; the result then
+    also has 'cash' (carried, uninvested; counted in value) and 'fees' (paid at each bar),
+    and start may carry 'cash'.
+    """
+    mask = np.isfinite(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_change = np.full_like(close, np.nan)
+        np.divide(close[1:], close[:-1], out=pct_change[1:])
+        pct_change[1:] -= 1.0
+
+        if execution is None:
+            units = np.divide(amount, close, out=np.zeros_like(close), where=mask)
+        else:
+            orders = execute_buys(np.where(mask, amount, 0.0), np.where(mask, execution['price'], np.nan),
+                                  fee=execution.get('fee', 0.0), min_notional=execution.get('min_notional', 0.0),
+                                  lot_step=execution.get('lot_step', 0.0),
+                                  cash=start.get('cash') if start is not None else None)
+            units = orders['units']
+        cum_units = np.cumsum(units, axis=0)
+        if np.ndim(amount):
+            invested = np.cumsum(np.where(mask, amount, 0.0), axis=0)
+        else:
+            invested = np.cumsum(mask, axis=0, dtype=np.float64)
+            invested *= amount
+
+        if start is not None and close.size:
+            cum_units += start["cum_units"]
+            invested += start["invested"]
+            first = mask.argmax(axis=0)
+            cols = np.flatnonzero(mask.any(axis=0))
+            pct_change[first[cols], cols] = close[first[cols], cols] / start["close"][cols] - 1.0
+        value = np.multiply(cum_units, close, out=np.full_like(close, np.nan), where=mask)
+        if execution is not None:
+            value += orders['cash']
+        pnl_pct = np.divide(value - invested, invested, out=np.full_like(close, np.nan), where=invested > 0)
+        pnl_pct *= 100
+    return {
+        "pct_change": pct_change,
+        "units": units,
+        "cum_units": cum_units,
+        "invested": invested,
+        "value": value,
+        "pnl_pct": pnl_pct,
+        **({"cash": orders["cash"], "fees": orders["fees"]} if execution is not None else {}),
+    }
+
+
+def asset_columns(result: dict, j: int, rows) -> dict:
+    """
+    Slice one asset's columns out of a sip_matrix result. `rows` are the positions of the
+    asset's own bars in the aligned index (e.g. index.get_indexer(df.index)).
+    """
+    return {key: arr[rows, j] for key, arr in result.items()}
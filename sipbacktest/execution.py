@@ -0,0 +1,140 @@
+import numpy as np
+
+# -----------------------------
+# Order execution model
+# -----------------------------
+# Frictionless SIP buys turn every contribution into units at the close. Real exchange orders
+# pay a taker fee, fill worse than the reference price (slippage), and are rejected below a
+# minimum notional or rounded down to a lot size. With those rules a $2 buy is not placed:
+# the cash is carried forward and spent once it reaches the minimum, so the buy of each bar
+# depends on what earlier bars left over. Without lot rounding every buy spends all the cash,
+# so the buying bars follow from running totals (searchsorted jumps, chained by pointer
+# doubling) and execute_buys stays a few whole-array passes. Lot rounding leaves change
+# behind, and only then is it a sequential pass over time, each step a handful of array
+# operations across all assets at once.
+#
+# An execution config is a dict like BINANCE_SPOT:
+#   fee           fraction of the notional paid on top of it (0.001 = 0.1% taker fee)
+#   slippage_bps  fill price above the reference price, in basis points
+#   min_notional  smallest order value (quote currency) the exchange accepts
+#   lot_step      units are rounded down to a multiple of this (0 = any amount);
+#                 a number, or {asset name: step}
+#   price         reference price of the bar: 'open', 'high', 'low', 'close' or 'average' (OHLC mean)
+
+BINANCE_SPOT = {'fee': 0.001, 'slippage_bps': 5.0, 'min_notional': 5.0, 'lot_step': 0.0, 'price': 'close'}
+
+FILL_PRICES = ('open', 'high', 'low', 'close', 'average')
+
+
+def fill_prices(ohlc: list, execution: dict) -> np.ndarray:
+    """
+    (time x asset) price each buy fills at: the execution's reference price from the
+    [open, high, low, close] matrices, plus its slippage.
+    """
+    rule = execution.get('price', 'close')
+    if rule not in FILL_PRICES:
+        raise ValueError(f"price must be one of {FILL_PRICES}")
+    price = np.mean(ohlc, axis=0) if rule == 'average' else ohlc[FILL_PRICES.index(rule)]
+    return price * (1.0 + execution.get('slippage_bps', 0.0) / 1e4)
+
+
+def lot_steps(names: list, execution: dict) -> np.ndarray:
+    """
+    Per-asset lot steps in `names` order (0 = no rounding).
+    """
+    step = execution.get('lot_step', 0.0) or 0.0
+    if isinstance(step, dict):
+        return np.array([step.get(name, 0.0) for name in names], dtype=np.float64)
+    return np.full(len(names), float(step))
+
+
+def _fill_chain(total: np.ndarray, has_price: np.ndarray, threshold: float) -> np.ndarray:
+    # (time x asset) bars that buy when each buy spends all the cash: the first priced bar whose
+    # running total reaches threshold, then from every buy at b the first priced bar reaching
+    # total[b] + threshold. Bars are numbered asset by asset, with one sentinel per asset after its
+    # last bar that every jump past the end lands on.
+    n_bars, n_assets = total.shape
+    # Running totals carry the rounding of every addition, so "reached" allows for it: $9.999999999999998
+    # of $2.50 contributions reaches a $10 minimum, as the same cash counted from zero would
+    threshold = threshold - np.finfo(np.float64).eps * n_bars * max(threshold, float(np.max(np.abs(total), initial=0.0)))
+    rows = np.where(has_price, np.arange(n_bars)[:, None], n_bars)
+    next_priced = np.vstack([np.minimum.accumulate(rows[::-1], axis=0)[::-1], np.full((1, n_assets), n_bars)])
+    jump = np.empty((n_assets, n_bars + 1), dtype=np.int64)
+    first = np.empty(n_assets, dtype=np.int64)
+    for j in range(n_assets):
+        column = total[:, j]
+        jump[j, :n_bars] = next_priced[np.searchsorted(column, column + threshold), j]
+        jump[j, n_bars] = n_bars
+        first[j] = next_priced[np.searchsorted(column, threshold), j]
+    offsets = np.arange(n_assets)[:, None] * (n_bars + 1)
+    jump = (jump + offsets).ravel()
+
+    # After round k the chain's first 2**k buys are marked and jump goes 2**k buys ahead
+    chain = np.zeros(n_assets * (n_bars + 1), dtype=bool)
+    marked = first + offsets[:, 0]
+    chain[marked] = True
+    while True:
+        reached = jump[marked]
+        reached = reached[~chain[reached]]
+        if not reached.size:
+            return chain.reshape(n_assets, n_bars + 1)[:, :n_bars].T
+        chain[reached] = True
+        marked = np.concatenate([marked, reached])
+        jump = jump[jump]
+
+
+def execute_buys(contributions: np.ndarray, price: np.ndarray, fee: float = 0.0, min_notional: float = 0.0,
+                 lot_step=0.0, cash: np.ndarray = None) -> dict:
+    """
+    Run (time x asset) contributions through the execution rules at fill prices `price`
+    (NaN where the asset has no bar). Each bar adds its contribution to the asset's cash and
+    buys with all of it (less lot rounding) once the order's notional reaches min_notional.
+    cash is the carried cash to start from. Returns (time x asset) arrays:
+      units (bought at the bar), cash (left after the bar), fees (paid at the bar)
+    """
+    n_bars, n_assets = contributions.shape
+    unit_cost = price * (1.0 + fee)
+    cash = np.zeros(n_assets) if cash is None else np.array(cash, dtype=np.float64)
+    lot_step = np.broadcast_to(np.asarray(lot_step, dtype=np.float64), (n_assets,))
+    rounded = lot_step > 0
+
+    units = np.zeros_like(contributions)
+    cash_left = np.zeros_like(contributions)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if not rounded.any() and min_notional <= 0 and not cash.any():
+            # Any size fills and nothing is carried: every contribution is spent at its own bar
+            np.divide(contributions, unit_cost, out=units, where=np.isfinite(unit_cost))
+
+        elif not rounded.any():
+            # Every order spends all the cash, so a bar buys once the contributions since the last
+            # buy reach the threshold: on the running totals, the buy after bar b is the first
+            # priced bar whose total is at least total[b] + threshold (searchsorted). The buys are
+            # the chain of those jumps from the first one, marked by pointer doubling in log2(bars)
+            # whole-array passes; the amounts then follow from cumulative sums
+            has_price = np.isfinite(unit_cost)
+            threshold = min_notional * (1.0 + fee)
+            total = np.cumsum(contributions, axis=0)
+            total += cash
+            if threshold > 0:
+                bought = _fill_chain(total, has_price, threshold)
+            else:
+                bought = has_price  # cash is never negative, so every priced bar buys
+            spent_until = np.maximum.accumulate(np.where(bought, total, 0.0), axis=0)
+            np.subtract(total, spent_until, out=cash_left)
+            spent_before = np.vstack([np.zeros((1, n_assets)), spent_until[:-1]])
+            np.divide(total - spent_before, unit_cost, out=units, where=bought)
+
+        else:
+            # Lot rounding leaves change behind, so cash is carried through every step
+            steps = np.where(rounded, lot_step, 1.0)
+            paid_cost = np.nan_to_num(unit_cost)  # bars without a price never fill, so they cost nothing
+            for t in range(n_bars):
+                cash += contributions[t]
+                size = cash / unit_cost[t]
+                size = np.where(rounded, np.floor(size / steps) * steps, size)
+                size = np.where(size * price[t] >= min_notional, size, 0.0)  # NaN price: no bar, no order
+                cash -= size * paid_cost[t]
+                np.maximum(cash, 0.0, out=cash)  # rounding residue of spending all of it
+                units[t] = size
+                cash_left[t] = cash
+    return {'units': units, 'cash': cash_left, 'fees': units * np.nan_to_num(price) * fee}
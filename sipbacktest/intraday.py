@@ -0,0 +1,263 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from sipbacktest.dashboard import add_metrics, build_dashboard_rows
+from sipbacktest.engine import sip_matrix
+from sipbacktest.paginate import iter_ohlcv_pages
+
+# -----------------------------
+# Intraday SIP (streamed)
+# -----------------------------
+# Hourly or 15-minute SIP schedules over years of bars are millions of rows per symbol, too
+# many for a DataFrame per asset or an Excel sheet. Here bars never leave a bounded window:
+#
+#   exchange pages -> <store>/<source>/<symbol>/<timeframe>.bars  (appended page by page)
+#   .bars (np.memmap) or .parquet (row batches) -> chunks of chunk_bars bars
+#   chunk -> sip_matrix from the carried state -> one rollup row per UTC day -> store parts
+#
+# A .bars file is raw float64 rows of [ts, open, high, low, close, volume]: appending is a
+# file write and reading is a memory map, so neither needs the whole history in memory.
+# Each chunk is cut at its last day boundary and the partial day is carried into the next
+# chunk, so every rollup row is a whole day. Only the running totals (units, invested,
+# last close) and the P/L% range cross chunks, so peak memory is set by chunk_bars and does
+# not grow with the length of the history. The daily rollups go to the columnar store
+# (sipbacktest.store layout, one part per chunk) and the per-symbol summary to the Dashboard.
+
+BAR_FIELDS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+CHUNK_BARS = 1_000_000
+DAY_MS = 86_400_000
+
+ROLLUP_COLUMNS = ['bars', 'close', 'crypto_bought', 'cumulative_crypto', 'cumulative_investment',
+                  'portfolio_value', 'portfolio_pct_change_value', 'portfolio_pct_change_low',
+                  'portfolio_pct_change_high']
+
+# Dashboard columns next to SUMMARY_COLUMNS
+EXTRA_COLUMNS = ['Bars', 'Lowest P/L (%)', 'Highest P/L (%)']
+
+
+def store_path(root: str, source: str, symbol: str, timeframe: str) -> str:
+    """
+    Bar store file of one symbol and timeframe, e.g. <root>/binance/BTC-USDT/1h.bars
+    """
+    return os.path.join(root, source, symbol.replace('/', '-'), f'{timeframe}.bars')
+
+
+def open_bars(path: str) -> np.ndarray:
+    """
+    Read-only (bars x 6) memory map of a .bars file; nothing is loaded until sliced.
+    """
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return np.empty((0, len(BAR_FIELDS)))
+    return np.memmap(path, dtype=np.float64, mode='r').reshape(-1, len(BAR_FIELDS))
+
+
+def download_bars(exchange, symbol: str, timeframe: str, path: str, since: int) -> int:
+    """
+    Append closed bars of symbol from `since` (ms), or from after the last stored bar, to the
+    .bars file at path, one exchange page at a time. Returns the number of bars added.
+    The bar still in progress is left out, so stored bars never change.
+    """
+    step = exchange.parse_timeframe(timeframe) * 1000
+    stored = open_bars(path)
+    if len(stored):
+        since = max(since, int(stored[-1, 0]) + step)
+    del stored
+    until = exchange.milliseconds() - step  # bars opened after this have not closed yet
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    added = 0
+    with open(path, 'ab') as f:
+        for page in iter_ohlcv_pages(exchange, symbol, timeframe, since, until=until):
+            f.write(np.asarray(page, dtype=np.float64).tobytes())
+            added += len(page)
+    return added
+
+
+def iter_bar_chunks(path: str, chunk_bars: int = CHUNK_BARS):
+    """
+    Yield (timestamps ms as int64, closes) arrays of at most chunk_bars bars, in time order,
+    from a .bars memory map or a Parquet file with 'timestamp' and 'close' columns.
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_bars, columns=['timestamp', 'close']):
+            ts = batch.column('timestamp').to_numpy(zero_copy_only=False)
+            if np.issubdtype(ts.dtype, np.datetime64):
+                ts = ts.astype('datetime64[ms]')
+            yield ts.astype(np.int64), batch.column('close').to_numpy(zero_copy_only=False).astype(np.float64)
+        return
+
+    # A fresh map per chunk, dropped once its columns are copied out: pages of chunks already
+    # done are unmapped instead of piling up in the resident set
+    row_bytes = len(BAR_FIELDS) * 8
+    n_bars = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+    for start in range(0, n_bars, chunk_bars):
+        block = np.memmap(path, dtype=np.float64, mode='r', offset=start * row_bytes,
+                          shape=(min(chunk_bars, n_bars - start), len(BAR_FIELDS)))
+        ts, close = block[:, 0].astype(np.int64), np.array(block[:, 4])
+        del block
+        yield ts, close
+
+
+def new_state() -> dict:
+    """
+    Running SIP state carried between chunks.
+    """
+    return {'close': np.nan, 'cum_units': 0.0, 'invested': 0.0, 'bars': 0, 'first_ts': None, 'last_ts': None,
+            'pnl_low': np.nan, 'pnl_high': np.nan}
+
+
+def _rollup(ts: np.ndarray, close: np.ndarray, amount: float, state: dict) -> pd.DataFrame:
+    # One row per UTC day of whole-day bars, continuing the SIP from state (updated in place)
+    start = {key: np.array([state[key]], dtype=np.float64) for key in ('close', 'cum_units', 'invested')}
+    result = sip_matrix(close[:, None], amount, start)
+    pnl = result['pnl_pct'][:, 0]
+
+    day = ts // DAY_MS
+    firsts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    lasts = np.r_[firsts[1:] - 1, len(ts) - 1]
+    units = np.add.reduceat(result['units'][:, 0], firsts)
+
+    state.update(close=float(close[-1]), cum_units=float(result['cum_units'][-1, 0]),
+                 invested=float(result['invested'][-1, 0]), bars=state['bars'] + len(ts), last_ts=int(ts[-1]),
+                 pnl_low=float(np.fmin(state['pnl_low'], np.nanmin(pnl))),
+                 pnl_high=float(np.fmax(state['pnl_high'], np.nanmax(pnl))))
+    if state['first_ts'] is None:
+        state['first_ts'] = int(ts[0])
+
+    index = pd.Index(pd.to_datetime(day[firsts] * DAY_MS, unit='ms').date, name='date')
+    return pd.DataFrame({
+        'bars': np.diff(np.r_[firsts, len(ts)]),
+        'close': close[lasts],
+        'crypto_bought': units,
+        'cumulative_crypto': result['cum_units'][lasts, 0],
+        'cumulative_investment': result['invested'][lasts, 0],
+        'portfolio_value': result['value'][lasts, 0],
+        'portfolio_pct_change_value': pnl[lasts],
+        'portfolio_pct_change_low': np.fmin.reduceat(pnl, firsts),
+        'portfolio_pct_change_high': np.fmax.reduceat(pnl, firsts),
+    }, index=index)
+
+
+def iter_daily_rollups(chunks, amount: float, state: dict = None):
+    """
+    SIP of `amount` at every bar of the (timestamps, closes) chunks, yielding a DataFrame of
+    whole-day rollup rows (ROLLUP_COLUMNS, indexed by date) per chunk. state (see new_state)
+    is updated in place and holds the final totals once the chunks are exhausted.
+    """
+    state = new_state() if state is None else state
+    carry_ts, carry_close = np.empty(0, dtype=np.int64), np.empty(0)
+    for ts, close in chunks:
+        ts, close = np.concatenate([carry_ts, ts]), np.concatenate([carry_close, close])
+        keep = np.isfinite(close)
+        ts, close = ts[keep], close[keep]
+        if not len(ts):
+            continue
+        # The chunk's last day may continue in the next chunk: hold it back
+        cut = np.searchsorted(ts, (ts[-1] // DAY_MS) * DAY_MS)
+        carry_ts, carry_close = ts[cut:], close[cut:]
+        if cut:
+            yield _rollup(ts[:cut], close[:cut], amount, state)
+    if len(carry_ts):
+        yield _rollup(carry_ts, carry_close, amount, state)
+
+
+def summary(label_col: str, name: str, state: dict) -> dict:
+    """
+    Dashboard row (SUMMARY_COLUMNS plus EXTRA_COLUMNS) from a final state.
+    """
+    if not state['bars']:
+        return {label_col: name, 'Start Date': '', 'End Date': '', 'Total Invested ($)': 0.0,
+                'Portfolio Value ($)': 0.0, 'P/L ($)': 0.0, 'P/L (%)': 0.0, 'Bars': 0,
+                'Lowest P/L (%)': np.nan, 'Highest P/L (%)': np.nan}
+    value = state['cum_units'] * state['close']
+    return {
+        label_col: name,
+        'Start Date': pd.to_datetime(state['first_ts'], unit='ms').date(),
+        'End Date': pd.to_datetime(state['last_ts'], unit='ms').date(),
+        'Total Invested ($)': state['invested'],
+        'Portfolio Value ($)': value,
+        'P/L ($)': value - state['invested'],
+        'P/L (%)': (value - state['invested']) / state['invested'] * 100,
+        'Bars': state['bars'],
+        'Lowest P/L (%)': state['pnl_low'],
+        'Highest P/L (%)': state['pnl_high'],
+    }
+
+
+def run_intraday(paths: dict, timeframe: str, amount: float, out_dir: str = 'results_intraday',
+                 formats=('parquet', 'xlsx'), chunk_bars: int = CHUNK_BARS, label: str = 'Crypto',
+                 verbose: bool = True) -> pd.DataFrame:
+    """
+    Streamed SIP over {name: .bars or .parquet path} at `timeframe`, buying `amount` per asset
+    at every bar. Daily rollups go to <out_dir>/<format>/frequency=<timeframe>/ one chunk at a
+    time; the Dashboard (summary rows, TOTAL, TOP n) goes there too and, with 'xlsx', to
+    <out_dir>/crypto_sip_intraday_<timeframe>.xlsx. Returns the Dashboard.
+    """
+    from sipbacktest.report import INTEGER_FORMAT, write_report
+    from sipbacktest.store import append_results, write_results
+
+    stores = [fmt for fmt in formats if fmt != 'xlsx']
+    for fmt in stores:
+        write_results(os.path.join(out_dir, fmt), timeframe, {}, fmt=fmt)  # start from an empty partition
+
+    rows = []
+    for name, path in paths.items():
+        state = new_state()
+        previous = None
+        for rollup in iter_daily_rollups(iter_bar_chunks(path, chunk_bars), amount, state):
+            # append_results replaces the stored last row, so each part restates the previous one
+            part = rollup if previous is None else pd.concat([previous, rollup])
+            for fmt in stores:
+                append_results(os.path.join(out_dir, fmt), timeframe, {name: part}, fmt=fmt)
+            previous = rollup.iloc[-1:]
+        rows.append(summary(label, name, state))
+        if verbose:
+            print(f"{name}: {state['bars']} {timeframe} bars")
+
+    dashboard = build_dashboard_rows(rows, label_col=label, rank_top_n=False)
+    extras = pd.DataFrame(rows, columns=[label, *EXTRA_COLUMNS]).set_index(label)
+    dashboard = add_metrics(dashboard, extras, label)
+
+    for fmt in stores:
+        append_results(os.path.join(out_dir, fmt), timeframe, {}, tables={'Dashboard': dashboard}, fmt=fmt)
+    if 'xlsx' in formats:
+        os.makedirs(out_dir, exist_ok=True)
+        write_report(os.path.join(out_dir, f'crypto_sip_intraday_{timeframe}.xlsx'), {}, dashboard, label,
+                     dashboard_formats={'Bars': INTEGER_FORMAT})
+    return dashboard
+
+
+def main(argv=None):
+    from sipbacktest.sources import make_exchange
+
+    parser = argparse.ArgumentParser(description="Hourly / minute SIP backtests streamed from a local bar store.")
+    parser.add_argument('--symbols', nargs='+', required=True, help="exchange pairs, e.g. BTC/USDT")
+    parser.add_argument('--timeframe', default='1h', help="bar and SIP interval, e.g. 1h or 15m")
+    parser.add_argument('--days', type=int, default=365, help="history to download when the store is empty")
+    parser.add_argument('--amount', type=float, default=1.0, help="SIP per asset per bar")
+    parser.add_argument('--store', default='data_cache/bars', help="bar store folder")
+    parser.add_argument('--exchange', default='binance')
+    parser.add_argument('--no-download', action='store_true', help="use the bars already in the store")
+    parser.add_argument('--formats', nargs='+', default=['parquet', 'xlsx'], choices=['xlsx', 'parquet', 'arrow', 'csv'])
+    parser.add_argument('--chunk-bars', type=int, default=CHUNK_BARS)
+    parser.add_argument('--out-dir', default='results_intraday')
+    args = parser.parse_args(argv)
+
+    exchange = None if args.no_download else make_exchange(args.exchange)
+    paths = {}
+    for symbol in args.symbols:
+        path = store_path(args.store, args.exchange, symbol, args.timeframe)
+        if exchange is not None:
+            since = exchange.milliseconds() - args.days * DAY_MS
+            print(f"{symbol}: {download_bars(exchange, symbol, args.timeframe, path, since)} new bars")
+        paths[symbol.split('/')[0]] = path
+    run_intraday(paths, args.timeframe, args.amount, args.out_dir, args.formats, args.chunk_bars)
+
+
+if __name__ == '__main__':
+    main()
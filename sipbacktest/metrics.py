@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Risk / return metrics
+# -----------------------------
+# Computed for every asset and every basket (TOTAL, TOP n) at once on (time x column)
+# arrays. A basket is a 0/1 membership matrix, so its value and cash flows are just
+# matrix products of the per-asset ones.
+#   XIRR          money-weighted annual return of the SIP cash flows (one buy per bar,
+#                 final value as the closing inflow), solved for all columns together
+#   drawdown,     measured on the time-weighted wealth index (returns net of the new
+#   underwater,   buys), so a drop is never hidden by the next contribution; underwater
+#   volatility    is the longest time spent below a previous peak, in calendar days
+
+METRIC_COLUMNS = ['XIRR (%)', 'Max Drawdown (%)', 'Longest Underwater (days)', 'Volatility (%)']
+
+DAYS_PER_YEAR = 365.25
+
+
+def basket_matrix(names: list, baskets: dict) -> np.ndarray:
+    """
+    {label: [asset names]} -> (asset x basket) 0/1 membership matrix in `names` order.
+    Names that are not in `names` are ignored.
+    """
+    position = {name: i for i, name in enumerate(names)}
+    members = np.zeros((len(names), len(baskets)))
+    for k, assets in enumerate(baskets.values()):
+        members[[position[name] for name in assets if name in position], k] = 1.0
+    return members
+
+
+def _ffill(close: np.ndarray) -> np.ndarray:
+    # Last available close at every row (NaN before an asset's first bar)
+    rows = np.where(np.isfinite(close), np.arange(len(close))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(close, rows, axis=0)
+
+
+def xirr(cashflows: np.ndarray, years: np.ndarray, tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """
+    Annual rate r per column such that sum_t cashflows[t] * (1 + r) ** (years[-1] - years[t]) == 0.
+    Safeguarded Newton: every column keeps a bracket and falls back to bisection (in log(1 + r))
+    whenever a Newton step leaves it. NaN where there is no sign change inside -99.99% .. 1e6%.
+    Converged columns drop out of the iteration.
+    """
+    horizon = (years[-1] - years)[:, None]
+    n_cols = cashflows.shape[1]
+    lo, hi = np.full(n_cols, -0.9999), np.full(n_cols, 1e4)
+
+    def g(r, cols):
+        flows, h = cashflows[:, cols], horizon
+        growth = np.exp(h * np.log1p(r))
+        return (flows * growth).sum(axis=0), (flows * h * growth).sum(axis=0) / (1.0 + r)
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        every = np.arange(n_cols)
+        solvable = (g(lo, every)[0] > 0) & (g(hi, every)[0] < 0)
+
+        # Start from the growth of money out vs money in over the average time invested
+        outflow = np.clip(-cashflows, 0, None)
+        paid, received = outflow.sum(axis=0), np.clip(cashflows, 0, None).sum(axis=0)
+        held = (outflow * horizon).sum(axis=0) / paid
+        rate = np.clip(np.nan_to_num((received / paid) ** (1.0 / held) - 1.0, nan=0.1), -0.99, 1e3)
+
+        active = np.flatnonzero(solvable)
+        for _ in range(max_iter):
+            if not len(active):
+                break
+            r = rate[active]
+            value, slope = g(r, active)
+            # g falls as r rises for SIP flows (outflows first, inflow last)
+            lo[active] = np.where(value > 0, r, lo[active])
+            hi[active] = np.where(value > 0, hi[active], r)
+            step = r - value / slope
+            bisect = np.expm1((np.log1p(lo[active]) + np.log1p(hi[active])) / 2)
+            step = np.where(np.isfinite(step) & (step > lo[active]) & (step < hi[active]), step, bisect)
+            rate[active] = step
+            active = active[np.abs(step - r) > tol * (1.0 + np.abs(r))]
+    return np.where(solvable, rate, np.nan)
+
+
+def _drawdown(returns: np.ndarray, days: np.ndarray):
+    # Max drawdown and longest time below a previous peak of the wealth index built from returns
+    wealth = np.cumprod(1.0 + np.nan_to_num(returns), axis=0)
+    peak = np.maximum.accumulate(wealth, axis=0)
+    max_drawdown = (wealth / peak - 1.0).min(axis=0, initial=0.0)
+    peak_row = np.where(wealth >= peak, np.arange(len(wealth))[:, None], 0)
+    np.maximum.accumulate(peak_row, axis=0, out=peak_row)
+    underwater = (days[:, None] - days[peak_row]).max(axis=0, initial=0.0)
+    return max_drawdown, underwater
+
+
+def sip_arrays(index, close: np.ndarray, amount: float) -> dict:
+    """
+    Per-asset (time x asset) building blocks of the metrics, which sum across a basket:
+      days:  calendar days since the first bar (1-D)
+      value: holdings valued at the last available close (0 before the first buy)
+      buys:  amount invested at each bar
+      flows: buys as outflows, plus the asset's final value as an inflow at its last bar
+    index and close are non-empty align_closes output; amount is the SIP per asset per bar.
+    """
+    days = (pd.to_datetime(index) - pd.to_datetime(index[0])).days.to_numpy(dtype=np.float64)
+    mask = np.isfinite(close)
+    buys = mask * float(amount)
+    units = np.cumsum(np.divide(amount, close, out=np.zeros_like(close), where=mask), axis=0)
+    value = np.nan_to_num(units * _ffill(close))
+
+    last = len(close) - 1 - mask[::-1].argmax(axis=0)
+    cols = np.flatnonzero(mask.any(axis=0))
+    flows = -buys
+    flows[last[cols], cols] += value[last[cols], cols]
+    return {'days': days, 'value': value, 'buys': buys, 'flows': flows}
+
+
+def column_metrics(value: np.ndarray, buys: np.ndarray, flows: np.ndarray, days: np.ndarray) -> dict:
+    """
+    METRIC_COLUMNS for every column of (time x column) sip_arrays-style inputs, as 1-D arrays.
+    """
+    n_cols = value.shape[1]
+    if len(days) == 0:
+        return {col: np.full(n_cols, np.nan) for col in METRIC_COLUMNS}
+
+    # Per-bar time-weighted returns: growth of what was held before this bar's buy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.full_like(value, np.nan)
+        returns[1:] = np.where(value[:-1] > 0, (value[1:] - buys[1:]) / value[:-1] - 1.0, np.nan)
+
+        # Sample standard deviation over the bars that have a return, scaled by bars per year
+        held = np.isfinite(returns)
+        count = held.sum(axis=0)
+        mean = np.where(held, returns, 0.0).sum(axis=0) / count
+        variance = (np.where(held, returns - mean, 0.0) ** 2).sum(axis=0) / (count - 1)
+        bars_per_year = (len(days) - 1) * DAYS_PER_YEAR / days[-1] if days[-1] > 0 else np.nan
+        volatility = np.where(count > 1, np.sqrt(variance * bars_per_year), np.nan)
+    max_drawdown, underwater = _drawdown(returns, days)
+
+    return {
+        'XIRR (%)': xirr(flows, days / DAYS_PER_YEAR) * 100,
+        'Max Drawdown (%)': max_drawdown * 100,
+        'Longest Underwater (days)': underwater,
+        'Volatility (%)': volatility * 100,
+    }
+
+
+def sip_metrics(index, names: list, close: np.ndarray, amount: float, baskets: dict = None) -> pd.DataFrame:
+    """
+    METRIC_COLUMNS for every asset and every basket ({label: [asset names]}), indexed by
+    name/label. index, names and close are align_closes output; amount is the SIP per asset per bar.
+    """
+    labels = list(names) + list(baskets or {})
+    if not len(index):
+        return pd.DataFrame(index=labels, columns=METRIC_COLUMNS, dtype=float)
+    arrays = sip_arrays(index, close, amount)
+
+    # Asset columns followed by basket columns
+    members = np.hstack([np.eye(len(names)), basket_matrix(names, baskets or {})])
+    metrics = column_metrics(arrays['value'] @ members, arrays['buys'] @ members, arrays['flows'] @ members,
+                             arrays['days'])
+    return pd.DataFrame(metrics, index=labels)
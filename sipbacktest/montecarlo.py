@@ -0,0 +1,162 @@
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sipbacktest.resample import RESAMPLE_RULES
+from sipbacktest.rolling import PERCENTILES, PNL_TOLERANCE
+from sipbacktest.sweep import frequency_rows
+
+# -----------------------------
+# Monte Carlo (block bootstrap) SIP simulator
+# -----------------------------
+# Forward-looking P/L% distributions from the same daily history the backtests use. Each
+# asset's daily log returns are resampled in blocks of consecutive bars (circular block
+# bootstrap), so calm and volatile stretches stay together, and cumulated into a
+# (paths x time) price array that starts at the last close. The SIP is then run on every
+# path at once: a buy at each bar of the frequency, on a future calendar that continues the
+# history's own (calendar-day or business-day) bar spacing.
+#
+# Paths are simulated in fixed-size chunks, each with its own seed spawned from (seed, asset),
+# so results only depend on the seed and never on how many worker processes ran the chunks.
+# One set of paths feeds every frequency; percentiles are taken over all paths per buy date.
+
+FAN_BANDS = [f'P{p} (%)' for p in PERCENTILES]
+PATH_CHUNK = 2000  # paths per task (bounds worker memory at PATH_CHUNK x horizon floats)
+
+
+def block_bootstrap(returns: np.ndarray, n_paths: int, horizon: int, block: int, rng) -> np.ndarray:
+    """
+    (n_paths x horizon) array of returns drawn as circular blocks of `block` consecutive values.
+    """
+    block = max(1, min(block, len(returns)))
+    starts = rng.integers(0, len(returns), size=(n_paths, math.ceil(horizon / block)))
+    rows = (starts[:, :, None] + np.arange(block)) % len(returns)
+    return returns[rows.reshape(n_paths, -1)[:, :horizon]]
+
+
+def future_calendar(index, horizon_days: int) -> pd.DatetimeIndex:
+    """
+    Bar dates for the next horizon_days calendar days after the history's last bar: every day
+    when the history trades on weekends (crypto), business days otherwise (stocks).
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(index))
+    start, end = index[-1] + pd.Timedelta(days=1), index[-1] + pd.Timedelta(days=horizon_days)
+    return pd.date_range(start, end, freq='D' if (index.dayofweek >= 5).any() else 'B')
+
+
+def sip_pnl_paths(prices: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    (paths x buys) P/L% of a constant-amount SIP buying at `rows` of each (paths x time) price path.
+    The amount cancels out of P/L%, so none is needed. The first buy breaks even exactly, and
+    rounding noise within PNL_TOLERANCE of 0 is snapped to 0 so it never counts as a loss.
+    """
+    buy_prices = prices[:, rows]
+    pnl = np.cumsum(1.0 / buy_prices, axis=1)
+    pnl *= buy_prices
+    pnl /= np.arange(1, len(rows) + 1)
+    pnl -= 1.0
+    pnl *= 100
+    pnl[:, :1] = 0.0
+    pnl[np.abs(pnl) < PNL_TOLERANCE] = 0.0
+    return pnl
+
+
+def _simulate_chunk(returns: np.ndarray, last_close: float, n_paths: int, horizon: int, block: int,
+                    seed, buy_rows: dict) -> dict:
+    # One chunk of price paths for one asset -> {frequency: (paths x buys) P/L%}
+    rng = np.random.default_rng(seed)
+    prices = block_bootstrap(returns, n_paths, horizon, block, rng)
+    np.cumsum(prices, axis=1, out=prices)
+    np.exp(prices, out=prices)
+    prices *= last_close
+    return {freq: sip_pnl_paths(prices, rows) for freq, rows in buy_rows.items()}
+
+
+def fan_table(calendar: pd.DatetimeIndex, rows: np.ndarray, name: str, pnl: np.ndarray,
+              label: str) -> pd.DataFrame:
+    """
+    Percentile bands of P/L% per buy date, plus the mean and the share of losing paths.
+    """
+    bands = np.percentile(pnl, PERCENTILES, axis=0)
+    return pd.DataFrame({
+        label: name,
+        'Date': calendar[rows].date,
+        'Buys': np.arange(1, len(rows) + 1),
+        **{band: bands[i] for i, band in enumerate(FAN_BANDS)},
+        'Mean (%)': pnl.mean(axis=0),
+        'Loss Probability (%)': (pnl < 0).mean(axis=0) * 100,
+    })
+
+
+def simulate_fans(daily_data: dict, names: list, close_column: str = 'close', frequencies=None,
+                  label: str = 'Crypto', n_paths: int = 10_000, horizon_days: int = 365, block: int = 20,
+                  seed: int = 0, workers: int = None) -> dict:
+    """
+    {frequency: fan table} for every asset in `names` that has daily bars in daily_data.
+    Each asset gets n_paths bootstrapped daily paths over horizon_days, shared by all
+    frequencies (RESAMPLE_RULES names). workers=1 simulates in this process.
+    """
+    frequencies = frequencies or list(RESAMPLE_RULES)
+    rules = {freq: RESAMPLE_RULES[freq] for freq in frequencies}
+    chunks = [min(PATH_CHUNK, n_paths - i) for i in range(0, n_paths, PATH_CHUNK)]
+    asset_seeds = np.random.SeedSequence(seed).spawn(len(names))
+    workers = workers or os.cpu_count()
+
+    tables = {freq: [] for freq in frequencies}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(chunks) > 1 else None
+    try:
+        for name, asset_seed in zip(names, asset_seeds):
+            daily = daily_data.get(name)
+            if daily is None or len(daily) < 2:
+                continue
+            close = daily[close_column].to_numpy(dtype=np.float64)
+            returns = np.diff(np.log(close[np.isfinite(close)]))
+            calendar = future_calendar(daily.index, horizon_days)
+            if not len(returns) or not len(calendar):
+                continue
+            buy_rows = frequency_rows(calendar, rules)
+
+            args = [(returns, close[np.isfinite(close)][-1], size, len(calendar), block, chunk_seed, buy_rows)
+                    for size, chunk_seed in zip(chunks, asset_seed.spawn(len(chunks)))]
+            parts = list(pool.map(_simulate_chunk, *zip(*args))) if pool else [_simulate_chunk(*a) for a in args]
+            for freq in frequencies:
+                pnl = np.concatenate([part[freq] for part in parts])
+                tables[freq].append(fan_table(calendar, buy_rows[freq], name, pnl, label))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    columns = [label, 'Date', 'Buys', *FAN_BANDS, 'Mean (%)', 'Loss Probability (%)']
+    return {freq: pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+            for freq, parts in tables.items()}
+
+
+def main(argv=None):
+    from sipbacktest.sweep import load_cached_daily
+
+    parser = argparse.ArgumentParser(description="Block-bootstrap SIP outcome fans over cached daily prices.")
+    parser.add_argument('--cache', default='data_cache/ohlcv.sqlite')
+    parser.add_argument('--source', default='binance', help="cache source key, e.g. binance or yahoo")
+    parser.add_argument('--symbols', nargs='+', required=True)
+    parser.add_argument('--frequency', default='daily', choices=list(RESAMPLE_RULES))
+    parser.add_argument('--paths', type=int, default=10_000)
+    parser.add_argument('--horizon-days', type=int, default=365)
+    parser.add_argument('--block', type=int, default=20, help="bootstrap block length in bars")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='monte_carlo.csv')
+    args = parser.parse_args(argv)
+
+    frames = load_cached_daily(args.cache, args.source, args.symbols)
+    fans = simulate_fans(frames, args.symbols, frequencies=[args.frequency], label='Symbol', n_paths=args.paths,
+                         horizon_days=args.horizon_days, block=args.block, seed=args.seed, workers=args.workers)
+    fans[args.frequency].to_csv(args.out, index=False)
+    print(f"Saved {len(fans[args.frequency])} rows to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# -----------------------------
+# Paginated OHLCV fetch
+# -----------------------------
+# Exchanges cap how many candles one fetch_ohlcv call returns (Binance: 1000), so long
+# histories are walked page by page with a `since` cursor.
+
+
+def _completed(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def iter_ohlcv_pages(exchange, symbol: str, timeframe: str, since: int, until: int = None,
+                     page_limit: int = 1000, prefetch: bool = True):
+    """
+    Yield lists of [ts, open, high, low, close, volume] candles from `since` (ms) onwards, page by page.
+
+    - Candles already yielded are dropped, so overlapping pages never produce duplicates.
+    - Consecutive requests are spaced by at least exchange.rateLimit milliseconds.
+    - With prefetch=True the next page is requested (speculatively, assuming a full page came back)
+      while the caller is still working on the current one; never past `until`. When the page did
+      not end right before the guess (a short page, or gaps in the data), the guess was wrong and
+      the cursor is re-issued from the last candle actually received.
+    """
+    step = exchange.parse_timeframe(timeframe) * 1000
+    min_interval = getattr(exchange, 'rateLimit', 0) / 1000
+    last_call = [0.0]
+
+    def request(cursor):
+        wait = last_call[0] + min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        last_call[0] = time.monotonic()
+        return exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+
+    pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def submit(cursor) -> Future:
+        return pool.submit(request, cursor) if pool else _completed(request(cursor))
+
+    try:
+        cursor = since
+        pending = submit(cursor)
+        last_ts = None
+        while True:
+            page = pending.result()
+            predicted = cursor + page_limit * step
+            pending = submit(predicted) if pool and page and (until is None or predicted <= until) else None
+
+            fresh = [c for c in page if last_ts is None or c[0] > last_ts]
+            if until is not None:
+                fresh = [c for c in fresh if c[0] <= until]
+            if not fresh:
+                break
+            last_ts = fresh[-1][0]
+            yield fresh
+            if until is not None and last_ts >= until:
+                break
+
+            next_cursor = last_ts + step
+            if pending is None or next_cursor != predicted:
+                if pending is not None:
+                    pending.cancel()
+                cursor = next_cursor
+                pending = submit(cursor)
+            else:
+                cursor = predicted
+    finally:
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def fetch_ohlcv_history(exchange, symbol: str, timeframe: str, since: int, until: int = None, **kwargs) -> list:
+    """
+    Collect every page from iter_ohlcv_pages into one list of candles.
+    """
+    rows = []
+    for chunk in iter_ohlcv_pages(exchange, symbol, timeframe, since, until=until, **kwargs):
+        rows.extend(chunk)
+    return rows
@@ -0,0 +1,417 @@
+import datetime
+import os
+
+import pandas as pd
+
+from sipbacktest import telemetry
+from sipbacktest.backtest import sheet_frame, sheet_number_formats, sip_backtest_all
+from sipbacktest.dashboard import DASHBOARD_NUMBER_FORMATS, add_metrics, basket_members, build_dashboard_rows, summary_banners, summary_row
+from sipbacktest.engine import align_closes
+from sipbacktest.metrics import sip_metrics
+from sipbacktest.montecarlo import FAN_BANDS, simulate_fans
+from sipbacktest.report import write_report
+from sipbacktest.resample import RESAMPLE_RULES, resample_ohlcv
+from sipbacktest.rolling import entry_date_sensitivity, rolling_start_pnl
+from sipbacktest.strategies import DEFAULT_STRATEGIES, strategy_pnl
+from sipbacktest.store import append_results, load_checkpoint, write_checkpoint, write_results
+
+# -----------------------------
+# Backtest runs
+# -----------------------------
+# fetch daily bars once -> per frequency: resample, batched SIP, Dashboard, entry-date
+# sensitivity -> Excel and/or columnar outputs. Everything an asset class needs to differ
+# on (symbols, column names, sheet layout, output folder) lives in ASSET_CLASSES.
+# ccxt, yfinance, xlsxwriter, openpyxl and pyarrow are only imported once a run actually needs them.
+#
+# Update mode continues a stored run instead of recomputing it. Each columnar store keeps a
+# checkpoint per asset: the last settled bar (ts, close, cumulative units and invested) and
+# the asset's Dashboard row. Only bars after the settled one are resampled, run through the
+# engine from that state and appended, so a daily refresh costs O(new bars). The last bar is
+# never settled: today's candle, or the current week/month, is recomputed on each update.
+#
+# With monte_carlo, every full run also gets a 'Monte Carlo' sheet/table per frequency:
+# bootstrapped forward P/L% fans simulated once from the daily history (sipbacktest.montecarlo).
+
+CRYPTO_LIST = {
+    'BTC': 'BTC/USDT',
+    'ETH': 'ETH/USDT',
+    'XRP': 'XRP/USDT',
+    'SOL': 'SOL/USDT',
+    'BNB': 'BNB/USDT',
+    'LTC': 'LTC/USDT',
+    'DOGE': 'DOGE/USDT',
+    'LINK': 'LINK/USDT',
+    'ADA': 'ADA/USDT',
+    'SUI': 'SUI/USDT'
+}
+
+STOCK_LIST = {
+    'AAPL': 'Apple',
+    'MSFT': 'Microsoft',
+    'AMZN': 'Amazon',
+    'GOOGL': 'Alphabet',
+    'META': 'Meta',
+    'NVDA': 'NVIDIA',
+    'TSLA': 'Tesla'
+}
+
+TOTAL_SIP_PER_PERIOD = 20.0  # USD per buy, split equally across the assets
+CACHE_FILE = 'data_cache/ohlcv.sqlite'  # Local OHLCV cache shared by both asset classes
+CONCURRENCY = 8  # Max symbols fetched in parallel
+STREAMING_REPORTS = True  # Stream workbooks with xlsxwriter's constant_memory mode (flat memory, no cell read-back)
+OUTPUT_FORMATS = ('xlsx',)  # Any of 'xlsx', 'parquet', 'arrow', 'csv'; columnar stores go to <out_dir>/<format>/
+MONTE_CARLO = {'n_paths': 10_000, 'horizon_days': 365, 'block': 20, 'seed': 0}  # simulate_fans options for monte_carlo=True
+
+ASSET_CLASSES = {
+    'crypto': {
+        'label': 'Crypto',
+        'symbols': CRYPTO_LIST,      # name -> exchange pair
+        'history': 1000,             # days of daily bars
+        'columns': ('open', 'high', 'low', 'close', 'volume'),
+        'units': 'crypto',
+        'rank_top_n': False,         # TOP n = first n in CRYPTO_LIST order
+        'keep_missing': False,       # assets that failed to fetch are left off the Dashboard
+        'pct_after_value': False,
+        'max_width': None,
+        'banner_titles': ('Best Crypto Performer', 'Best Basket Performer'),
+        'out_dir': 'results_crypto',
+        'report_name': 'crypto_sip_report',
+    },
+    'stocks': {
+        'label': 'Stock',
+        'symbols': STOCK_LIST,       # ticker -> company name
+        'history': '3y',             # yfinance period of daily bars
+        'columns': ("Open", "High", "Low", "Close", "Volume"),
+        'units': 'shares',
+        'rank_top_n': True,          # TOP n = n best by P/L (%)
+        'keep_missing': True,        # failed tickers get a zero row on the Dashboard
+        'pct_after_value': True,
+        'max_width': 60,
+        'banner_titles': ('Best Stock Performer', 'Best TopN Portfolio'),
+        'out_dir': 'results_stocks',
+        'report_name': 'stocks_sip_report',
+    },
+}
+
+
+def fetch_daily(asset_class: str, symbols: dict, history=None, cache=None, concurrency: int = CONCURRENCY,
+                min_interval: float = None):
+    """
+    ({name: daily OHLCV DataFrame}, {name: error}) for one asset class.
+    history is days of bars for crypto and a yfinance period ("3y") for stocks.
+    min_interval spaces Yahoo downloads (seconds, default sources.YAHOO_MIN_INTERVAL);
+    crypto requests follow the exchange's own rate limit.
+    """
+    from sipbacktest.sources import YAHOO_MIN_INTERVAL, fetch_crypto_daily, fetch_stocks_daily
+
+    history = history or ASSET_CLASSES[asset_class]['history']
+    if asset_class == 'crypto':
+        return fetch_crypto_daily(symbols, history, cache=cache, concurrency=concurrency)
+    return fetch_stocks_daily(list(symbols), period=history, cache=cache, concurrency=concurrency,
+                              min_interval=YAHOO_MIN_INTERVAL if min_interval is None else min_interval)
+
+
+def _json_row(row: dict) -> dict:
+    return {key: value.isoformat() if isinstance(value, datetime.date) else value for key, value in row.items()}
+
+
+def _dashboard_row(row: dict) -> dict:
+    dates = ('Start Date', 'End Date')
+    return {key: datetime.date.fromisoformat(value) if key in dates and value else value
+            for key, value in row.items()}
+
+
+def sip_checkpoint(asset_class: str, results: dict, sip_amount: float, previous: dict = None,
+                   execution: dict = None) -> dict:
+    """
+    Running state after `results`, to continue from with update_frequency:
+      {'sip_amount': ..., 'execution': ..., 'assets': {name: {'ts', 'close', 'cum_units', 'invested', 'summary'}}}
+    ts/close/cum_units/invested (and cash/fees with an execution model) describe the
+    second-to-last bar (the last one may still change); summary is the asset's Dashboard row.
+    Entries of `previous` carry over for assets that are not in results, and keep their
+    original Start Date.
+    """
+    config = ASSET_CLASSES[asset_class]
+    label, close = config['label'], config['columns'][3]
+    assets = dict((previous or {}).get('assets', {}))
+    for name, df in results.items():
+        if df.empty:
+            continue
+        entry = dict(assets.get(name) or {'ts': None, 'close': None, 'cum_units': 0.0, 'invested': 0.0})
+        if len(df) > 1:
+            settled = df.iloc[-2]
+            entry.update(ts=df.index[-2].isoformat(), close=float(settled[close]),
+                         cum_units=float(settled[f"cumulative_{config['units']}"]),
+                         invested=float(settled['cumulative_investment']))
+            if 'cash' in df:  # runs with an execution model carry cash and fees between bars
+                entry.update(cash=float(settled['cash']), fees=float(settled['cumulative_fees']))
+        summary = summary_row(label, name, df)
+        if name in assets:
+            summary['Start Date'] = assets[name]['summary']['Start Date']
+        entry['summary'] = _json_row(summary)
+        assets[name] = entry
+    return {'sip_amount': sip_amount, 'execution': execution, 'assets': assets}
+
+
+def dashboard_metrics(asset_class: str, dashboard_df: pd.DataFrame, per_asset_rows: list, frames: dict,
+                      sip_amount: float, strategies: list = None):
+    """
+    Add the risk/return columns (XIRR, drawdown, underwater time, volatility) and one P/L (%)
+    column per strategy to the Dashboard, for every asset and basket of per_asset_rows, from the
+    frictionless SIP over `frames`. Returns (dashboard_df, align_closes(frames) output).
+    """
+    config = ASSET_CLASSES[asset_class]
+    label = config['label']
+
+    # XIRR, drawdown, underwater time and volatility for every asset and every Dashboard basket
+    with telemetry.stage('metrics'):
+        index, aligned, close = align_closes(frames, config['columns'][3])
+        baskets = basket_members(per_asset_rows, label, config['rank_top_n'])
+        dashboard_df = add_metrics(dashboard_df, sip_metrics(index, aligned, close, sip_amount, baskets), label)
+
+    # The same assets and baskets under each contribution strategy, all in one engine pass
+    if strategies:
+        with telemetry.stage('strategies'):
+            dashboard_df = add_metrics(dashboard_df, strategy_pnl(close, aligned, sip_amount, strategies, baskets),
+                                       label)
+    return dashboard_df, (index, aligned, close)
+
+
+def backtest_frequency(asset_class: str, daily_data: dict, symbols, sip_amount: float, rule: str = None,
+                       progress: str = None, strategies: list = None, execution: dict = None) -> dict:
+    """
+    One frequency of the report, as
+      {'frames': resampled OHLCV, 'results': SIP frames, 'dashboard': Dashboard rows,
+       'sensitivity': entry-date sensitivity, 'banners': Dashboard banner lines}
+    symbols fixes the Dashboard order; rule is a RESAMPLE_RULES value (None = daily bars).
+    progress, when given, is the tqdm description for the per-asset resampling loop.
+    strategies (sipbacktest.strategies specs) add a P/L (%) column each to the Dashboard.
+    execution (sipbacktest.execution config) applies fees, slippage and minimum orders to the
+    SIP frames and so to the Dashboard amounts; risk metrics and strategies stay frictionless.
+    """
+    config = ASSET_CLASSES[asset_class]
+    label, columns = config['label'], config['columns']
+    prices = columns[:4]  # open, high, low, close
+    names = [name for name in symbols if config['keep_missing'] or name in daily_data]
+
+    # Resampling is the per-asset work (and what the progress bar follows); the SIP itself is
+    # one batched pass over all assets
+    assets = [name for name in names if name in daily_data]
+    if progress:
+        from tqdm import tqdm
+        assets = tqdm(assets, desc=progress)
+    with telemetry.stage('resample'):
+        frames = {name: resample_ohlcv(daily_data[name], rule, columns=columns) for name in assets}
+    with telemetry.stage('sip'):
+        results = sip_backtest_all(frames, sip_amount, prices=prices, units=config['units'], execution=execution)
+
+    with telemetry.stage('dashboard'):
+        per_asset_rows = [summary_row(label, name, results.get(name)) for name in names
+                          if config['keep_missing'] or name in results]
+        dashboard_df = build_dashboard_rows(per_asset_rows, label_col=label, rank_top_n=config['rank_top_n'])
+
+    dashboard_df, (index, aligned, close) = dashboard_metrics(asset_class, dashboard_df, per_asset_rows, frames,
+                                                              sip_amount, strategies)
+
+    # Final P/L% for every possible entry date, summarised per asset
+    with telemetry.stage('sensitivity'):
+        sensitivity_df = entry_date_sensitivity(index, aligned, rolling_start_pnl(close, sip_amount), label)
+
+    return {
+        'frames': frames,
+        'results': results,
+        'dashboard': dashboard_df,
+        'sensitivity': sensitivity_df,
+        'banners': summary_banners(dashboard_df, label, config['banner_titles']),
+        'checkpoint': sip_checkpoint(asset_class, results, sip_amount, execution=execution),
+        'monte_carlo': None,
+    }
+
+
+def update_frequency(asset_class: str, daily_data: dict, symbols, sip_amount: float, rule: str,
+                     checkpoint: dict, execution: dict = None, strategies: list = None):
+    """
+    Continue a stored frequency from its checkpoint. Returns the backtest_frequency layout with
+    'results' holding, per asset, the recomputed last bar followed by any new bars
+    (ready for store.append_results) and no 'sensitivity' table, or None when a full run is
+    needed: different SIP amount or execution model, or the fetched history no longer reaches the checkpoint.
+    The SIP frames only cover the new bars, but the Dashboard gets the same columns as a full run:
+    the risk/return and strategy columns need whole histories, so they are recomputed from
+    daily_data (one vectorized pass, like backtest_frequency).
+    """
+    if checkpoint is None or checkpoint['sip_amount'] != sip_amount or checkpoint.get('execution') != execution:
+        return None
+    config = ASSET_CLASSES[asset_class]
+    label, columns = config['label'], config['columns']
+    assets = checkpoint['assets']
+
+    frames, start = {}, {}
+    with telemetry.stage('resample'):
+        for name in symbols:
+            daily = daily_data.get(name)
+            if daily is None or daily.empty:
+                continue
+            entry = assets.get(name)
+            if entry is None or entry['ts'] is None:
+                frames[name] = resample_ohlcv(daily, rule, columns=columns)  # new asset: its whole history
+                continue
+            settled = pd.Timestamp(entry['ts'])
+            when = pd.to_datetime(daily.index)
+            if when[0] > settled:
+                return None
+            # Daily bars after the settled bar; for weekly/monthly, from the start of the settled bin
+            pos = when.searchsorted(settled, side='right' if rule is None else 'left')
+            bars = resample_ohlcv(daily.iloc[pos:], rule, columns=columns)
+            frames[name] = bars[pd.to_datetime(bars.index) > settled]
+            start[name] = entry
+
+    with telemetry.stage('sip'):
+        results = sip_backtest_all(frames, sip_amount, prices=columns[:4], units=config['units'], start=start,
+                                   execution=execution)
+    checkpoint = sip_checkpoint(asset_class, results, sip_amount, previous=checkpoint, execution=execution)
+
+    # Dashboard from every asset's checkpointed row, so assets without new bars keep theirs
+    with telemetry.stage('dashboard'):
+        per_asset_rows = []
+        for name in symbols:
+            if name in checkpoint['assets']:
+                per_asset_rows.append(_dashboard_row(checkpoint['assets'][name]['summary']))
+            elif config['keep_missing']:
+                per_asset_rows.append(summary_row(label, name, None))
+        dashboard_df = build_dashboard_rows(per_asset_rows, label_col=label, rank_top_n=config['rank_top_n'])
+    with telemetry.stage('resample'):
+        histories = {name: resample_ohlcv(daily_data[name], rule, columns=columns) for name in symbols
+                     if name in checkpoint['assets'] and daily_data.get(name) is not None}
+    dashboard_df, _ = dashboard_metrics(asset_class, dashboard_df, per_asset_rows, histories, sip_amount, strategies)
+
+    return {
+        'frames': frames,
+        'results': results,
+        'dashboard': dashboard_df,
+        'sensitivity': None,
+        'banners': summary_banners(dashboard_df, label, config['banner_titles']),
+        'checkpoint': checkpoint,
+        'monte_carlo': None,
+    }
+
+
+def write_outputs(asset_class: str, freq: str, output: dict, formats=OUTPUT_FORMATS, out_dir: str = None,
+                  streaming: bool = STREAMING_REPORTS, append: bool = False) -> list:
+    """
+    Save one frequency's output in every requested format; returns the paths written.
+    Columnar stores also get the output's checkpoint. append=True adds an update_frequency
+    output to the existing stores (workbooks are only written by full runs). While a
+    telemetry.RunStats is recording, workbooks get a 'Run Stats' sheet of everything timed so far.
+    """
+    config = ASSET_CLASSES[asset_class]
+    out_dir = out_dir or config['out_dir']
+    os.makedirs(out_dir, exist_ok=True)
+    tables = {'Dashboard': output['dashboard']}
+    if output['sensitivity'] is not None:
+        tables['Entry Date Sensitivity'] = output['sensitivity']
+    fan_charts = {}
+    if output.get('monte_carlo') is not None:
+        tables['Monte Carlo'] = output['monte_carlo']
+        fan_charts['Monte Carlo'] = (output['monte_carlo'], FAN_BANDS)
+
+    paths = []
+    for fmt in formats:
+        if fmt == 'xlsx' and append:
+            continue
+        with telemetry.stage(f'write {fmt}', frequency=freq):
+            if fmt == 'xlsx':
+                # Per-asset sheets with color scale, Dashboard with bold TOTAL row, color scale and
+                # merged yellow banners, then the sensitivity sheet
+                path = os.path.join(out_dir, f"{config['report_name']}_{freq}.xlsx")
+                sheets = {name: sheet_frame(df, config['pct_after_value']) for name, df in output['results'].items()}
+                extra_sheets = {'Entry Date Sensitivity': output['sensitivity']}
+                if telemetry.active() is not None:
+                    extra_sheets['Run Stats'] = telemetry.active().table()
+                write_report(path, sheets, output['dashboard'], config['label'], banners=output['banners'],
+                             extra_sheets=extra_sheets, max_width=config['max_width'], streaming=streaming,
+                             number_formats=sheet_number_formats(config['units']),
+                             dashboard_formats=DASHBOARD_NUMBER_FORMATS, fan_charts=fan_charts)
+            else:
+                root = os.path.join(out_dir, fmt)
+                (append_results if append else write_results)(root, freq, output['results'], tables, fmt=fmt)
+                write_checkpoint(root, freq, output['checkpoint'])
+                path = os.path.join(root, f"frequency={freq}")
+        paths.append(path)
+    return paths
+
+
+def run(asset_class: str, symbols: dict = None, total_amount: float = TOTAL_SIP_PER_PERIOD, frequencies=None,
+        history=None, formats=OUTPUT_FORMATS, cache_file: str = CACHE_FILE, concurrency: int = CONCURRENCY,
+        streaming: bool = STREAMING_REPORTS, out_dir: str = None, update: bool = False,
+        monte_carlo=None, strategies: list = DEFAULT_STRATEGIES, execution: dict = None,
+        stats: telemetry.RunStats = None, min_interval: float = None, verbose: bool = True) -> dict:
+    """
+    Full backtest for 'crypto' or 'stocks': one fetch, then every frequency.
+    Returns {frequency: backtest_frequency output}; formats=() skips writing files.
+      symbols:      {name: pair/company}; defaults to the asset class's list
+      total_amount: invested per buy across all symbols (each gets total_amount / len(symbols))
+      frequencies:  names from RESAMPLE_RULES; all of them by default
+      cache_file:   SQLite OHLCV cache, or None to always hit the network
+      update:       append new bars to the columnar store in `formats` from its checkpoint;
+                    falls back to a full run (workbooks included) where that is not possible
+      execution:    fees/slippage/minimum-order model for the buys (e.g. execution.BINANCE_SPOT)
+      strategies:   contribution strategies compared with the plain SIP on the Dashboard
+      monte_carlo:  True for MONTE_CARLO, or a dict of simulate_fans options (n_paths, horizon_days,
+                    block, seed, workers), to add forward P/L% fans to every full run
+      min_interval: seconds between Yahoo downloads (stocks); None for sources.YAHOO_MIN_INTERVAL
+      stats:        a telemetry.RunStats to record stage timings, fetch/cache counters and peak
+                    memory into (and to add a 'Run Stats' sheet to the workbooks); None records nothing
+    """
+    from sipbacktest.cache import OHLCVCache
+
+    with telemetry.recording(stats):
+        config = ASSET_CLASSES[asset_class]
+        symbols = symbols or config['symbols']
+        frequencies = frequencies or list(RESAMPLE_RULES)
+        cache = OHLCVCache(cache_file) if cache_file else None
+
+        # One network pull per symbol, shared by every frequency; all symbols are fetched concurrently
+        with telemetry.stage('fetch'):
+            daily_data, fetch_errors = fetch_daily(asset_class, symbols, history, cache=cache, concurrency=concurrency,
+                                                   min_interval=min_interval)
+        telemetry.count('fetch errors', len(fetch_errors))
+        if verbose:
+            for name, error in fetch_errors.items():
+                print(f"Fetch failed for {name}: {error!r}")
+
+        sip_amount = total_amount / len(symbols)
+        stores = [fmt for fmt in formats if fmt != 'xlsx']
+        if update and not stores:
+            raise ValueError("update mode appends to a columnar store: add 'parquet', 'arrow' or 'csv' to formats")
+        fans = {}
+        if monte_carlo:
+            options = MONTE_CARLO if monte_carlo is True else {**MONTE_CARLO, **monte_carlo}
+            with telemetry.stage('monte carlo'):
+                fans = simulate_fans(daily_data, list(symbols), config['columns'][3], frequencies, config['label'],
+                                     **options)
+
+        outputs = {}
+        for freq in frequencies:
+            with telemetry.scope(freq):
+                output = None
+                if update:
+                    # The first store's checkpoint drives the update; every store was written from the same runs
+                    root = os.path.join(out_dir or config['out_dir'], stores[0])
+                    output = update_frequency(asset_class, daily_data, symbols, sip_amount, RESAMPLE_RULES[freq],
+                                              load_checkpoint(root, freq), execution=execution,
+                                              strategies=strategies)
+                    if output is None and verbose:
+                        print(f"No usable checkpoint for {freq} in {root}; running the full history")
+                if output is None:
+                    output = backtest_frequency(asset_class, daily_data, symbols, sip_amount, RESAMPLE_RULES[freq],
+                                                progress=f"Processing {freq}" if verbose else None,
+                                                strategies=strategies, execution=execution)
+                    output['monte_carlo'] = fans.get(freq)
+                    paths = write_outputs(asset_class, freq, output, formats, out_dir, streaming)
+                else:
+                    paths = write_outputs(asset_class, freq, output, stores, out_dir, streaming, append=True)
+                outputs[freq] = output
+                for path in paths:
+                    if verbose:
+                        print(f"Saved {path}")
+        return outputs
@@ -0,0 +1,389 @@
+import datetime
+import functools
+import weakref
+from copy import copy
+
+import numpy as np
+import pandas as pd
+
+from sipbacktest import telemetry
+
+# -----------------------------
+# Excel report writer
+# -----------------------------
+# Everything the sheets need (column widths, color-scale ranges, bold rows, banners) is
+# derived from the DataFrames up front, so rows can be streamed straight to disk and the
+# cells never have to be read back.
+# Streaming workbooks are written with xlsxwriter in constant_memory mode: each row is flushed
+# as soon as the next one starts, and rows are taken from the typed columns STREAM_ROWS at a
+# time, so memory stays flat however long the sheets get. In-memory workbooks (streaming=False)
+# are built with openpyxl. Both are imported on first use, so importing the library does not
+# pay for them.
+# Values are written at full precision; rounding is only an Excel number format.
+
+DECIMAL_FORMAT = '0.00'                               # default for every float column
+UNITS_FORMAT = '0.00000000'                           # coin/share quantities
+INTEGER_FORMAT = '0'                                  # counts, e.g. days
+PERCENT_FORMAT = '0.00%'                              # fractions, e.g. bar-to-bar change
+SIGNED_PERCENT_FORMAT = '+0.00"%";-0.00"%";0.00"%"'   # P/L already in percent: 12.3 -> +12.30%
+DATE_FORMAT = 'yyyy-mm-dd'                            # dates and datetimes, as openpyxl shows them
+DATETIME_FORMAT = 'yyyy-mm-dd h:mm:ss'
+
+STREAM_ROWS = 1000  # rows converted to Python values at a time by the streaming writer
+
+# workbook -> {(font, border, alignment, fill, number_format): prototype cell}
+_style_prototypes = weakref.WeakKeyDictionary()
+# xlsxwriter workbook -> {format properties: Format}
+_xlsx_formats = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=None)
+def _styles() -> dict:
+    """
+    Shared header/banner styles: {'header_font', 'header_border', 'header_alignment', 'banner_fill'}.
+    """
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    return {
+        'header_font': Font(bold=True),
+        'header_border': Border(*(Side(style='thin'),) * 4),
+        'header_alignment': Alignment(horizontal='center', vertical='top'),
+        'banner_fill': PatternFill(start_color="FFF176", end_color="FFF176", fill_type="solid"),
+    }
+
+
+def color_scale_rule():
+    """
+    Red-yellow-green 3-color scale on a fixed -100..0..+100 range.
+    """
+    from openpyxl.formatting.rule import ColorScaleRule
+
+    return ColorScaleRule(
+        start_type='num', start_value=-100, start_color='F8696B',   # red
+        mid_type='num',   mid_value=0,    mid_color='FFEB84',       # yellow
+        end_type='num',   end_value=100,  end_color='63BE7B'        # green
+    )
+
+
+def _formatted_width(values: pd.Series, number_format: str) -> int:
+    # Width of the largest number once formatted: integer digits + sign + decimals (+ '%' suffix)
+    if not values.notna().any():
+        return 0
+    decimals = len(number_format.split(';')[0].split('.')[1].rstrip('"%')) if '.' in number_format else 0
+    largest = float(np.nanmax(np.abs(values.to_numpy(dtype=np.float64))))
+    if number_format.endswith('%'):
+        largest *= 100
+    return len(f"{largest:.{decimals}f}") + 1 + ('%' in number_format)
+
+
+def _text_width(values: pd.Series, number_format: str = None) -> int:
+    if values.empty:
+        return 0
+    if number_format:
+        if pd.api.types.is_float_dtype(values):
+            return _formatted_width(values, number_format)
+        is_float = values.map(lambda v: isinstance(v, float)).astype(bool)
+        return max(_formatted_width(values[is_float], number_format), _text_width(values[~is_float]))
+    return int(values.astype(str).where(values.notna(), '').str.len().max())
+
+
+def _number_formats(df: pd.DataFrame, number_formats: dict = None) -> dict:
+    # Only float cells are formatted, so every column can default to DECIMAL_FORMAT
+    formats = {col: DECIMAL_FORMAT for col in df.columns}
+    formats.update({col: fmt for col, fmt in (number_formats or {}).items() if col in df.columns})
+    return formats
+
+
+def column_widths(df: pd.DataFrame, index: bool = True, max_width: int = None, number_formats: dict = None) -> list:
+    """
+    Autofit widths (longest rendered value + 2) for the index (if written) and every column,
+    measured on the number-formatted values.
+    """
+    formats = _number_formats(df, number_formats)
+    columns = [(df.index.name or '', df.index.to_series(), None)] if index else []
+    columns += [(str(col), df[col], formats.get(col)) for col in df.columns]
+    widths = [max(len(header), _text_width(values, fmt)) + 2 for header, values, fmt in columns]
+    return [min(w, max_width) for w in widths] if max_width else widths
+
+
+def _cell_values(df: pd.DataFrame, index: bool):
+    # NaN/NaT become empty cells; numpy scalars become plain Python values
+    values = df.astype(object).where(df.notna(), None)
+    if index:
+        values.insert(0, '__index__', df.index)
+    for row in values.itertuples(index=False, name=None):
+        yield [v.item() if isinstance(v, np.generic) else v for v in row]
+
+
+def _styled(ws, value, font=None, border=None, alignment=None, fill=None, number_format=None):
+    # Assigning font/border/... goes through the workbook's style registry on every cell, which
+    # dominates when a whole index column is styled; resolve each combination once and copy it.
+    from openpyxl.cell import WriteOnlyCell
+
+    prototypes = _style_prototypes.setdefault(ws.parent, {})
+    key = (font, border, alignment, fill, number_format)
+    proto = prototypes.get(key)
+    if proto is None:
+        proto = WriteOnlyCell(ws)
+        if font:
+            proto.font = font
+        if border:
+            proto.border = border
+        if alignment:
+            proto.alignment = alignment
+        if fill:
+            proto.fill = fill
+        if number_format:
+            proto.number_format = number_format
+        prototypes[key] = proto
+    cell = WriteOnlyCell(ws)
+    cell._style = copy(proto._style)
+    cell.value = value  # after the style copy, so dates still pick up their number format
+    return cell
+
+
+def _xlsx_format(wb, **properties):
+    # One Format per distinct combination, shared by every sheet of the workbook
+    formats = _xlsx_formats.setdefault(wb, {})
+    key = tuple(sorted(properties.items()))
+    if key not in formats:
+        formats[key] = wb.add_format(properties)
+    return formats[key]
+
+
+def _row_chunks(df: pd.DataFrame, index: bool):
+    # (first row, rows) with up to STREAM_ROWS rows of plain Python values, taken column by column
+    # from the typed frame: float columns keep NaN (skipped on write), other missing values are None
+    columns = ([df.index.to_series()] if index else []) + [df.iloc[:, i] for i in range(df.shape[1])]
+    for start in range(0, len(df), STREAM_ROWS):
+        chunk = []
+        for values in columns:
+            values = values.iloc[start:start + STREAM_ROWS]
+            if pd.api.types.is_float_dtype(values) or pd.api.types.is_integer_dtype(values):
+                chunk.append(values.tolist())
+            else:
+                values = values.astype(object)
+                chunk.append([v.item() if isinstance(v, np.generic) else v
+                              for v in values.where(values.notna(), None)])
+        yield start, zip(*chunk)
+
+
+def _stream_sheet(wb, name: str, df: pd.DataFrame, index: bool, color_scale_column: str, bold_labels: tuple,
+                  banners: tuple, max_width: int, number_formats: dict):
+    # write_sheet for an xlsxwriter workbook
+    from xlsxwriter.utility import xl_col_to_name
+
+    ws = wb.add_worksheet(name)
+    headers = ([df.index.name or ''] if index else []) + [str(col) for col in df.columns]
+    n_cols = len(headers)
+    formats = _number_formats(df, number_formats)
+    column_formats = ([None] if index else []) + [formats.get(col) for col in df.columns]
+    float_columns = ([False] if index else []) + [pd.api.types.is_float_dtype(dtype) for dtype in df.dtypes]
+
+    def cell_formats(bold: bool) -> list:
+        # per column: {value type: Format}; index cells are bold with a border, like the headers
+        cells = []
+        for col, fmt in enumerate(column_formats):
+            style = {'bold': True, 'border': 1} if index and col == 0 else {'bold': True} if bold else {}
+            cells.append({float: _xlsx_format(wb, **style, **({'num_format': fmt} if fmt else {})),
+                          datetime.date: _xlsx_format(wb, num_format=DATE_FORMAT, **style),
+                          datetime.datetime: _xlsx_format(wb, num_format=DATETIME_FORMAT, **style),
+                          None: _xlsx_format(wb, **style) if style else None})
+        return cells
+
+    # Float columns get their number format once, on the column; their plain cells are written
+    # without a format and pick it up. Bold rows and mixed (object) columns still format per cell.
+    plain, bold = cell_formats(False), cell_formats(True)
+    widths = column_widths(df, index=index, max_width=max_width, number_formats=formats)
+    for col, (width, is_float) in enumerate(zip(widths, float_columns)):
+        ws.set_column(col, col, width, plain[col][float] if is_float else None)
+        if is_float:
+            plain[col][float] = None
+
+    ws.write_row(0, 0, headers, _xlsx_format(wb, bold=True, border=1, align='center', valign='top'))
+    for start, rows in _row_chunks(df, index):
+        for row, values in enumerate(rows, start + 1):
+            cells = bold if bold_labels and values[0] in bold_labels else plain
+            for col, value in enumerate(values):
+                if value is None or value != value:  # missing: leave the cell empty
+                    continue
+                if isinstance(value, float):
+                    ws.write_number(row, col, value, cells[col][float])
+                elif isinstance(value, datetime.date):
+                    kind = datetime.datetime if isinstance(value, datetime.datetime) else datetime.date
+                    ws.write_datetime(row, col, value, cells[col][kind])
+                else:
+                    ws.write(row, col, value, cells[col][None])
+
+    last_row = len(df) + 1
+    if color_scale_column in headers and len(df):
+        col_letter = xl_col_to_name(headers.index(color_scale_column))
+        ws.conditional_format(f"{col_letter}2:{col_letter}{last_row}", {
+            'type': '3_color_scale',
+            'min_type': 'num', 'min_value': -100, 'min_color': '#F8696B',   # red
+            'mid_type': 'num', 'mid_value': 0,    'mid_color': '#FFEB84',   # yellow
+            'max_type': 'num', 'max_value': 100,  'max_color': '#63BE7B'    # green
+        })
+
+    banner = _xlsx_format(wb, bold=True, bg_color='#FFF176')
+    for text in banners:
+        last_row += 2
+        if n_cols > 1:
+            ws.merge_range(last_row - 1, 0, last_row - 1, n_cols - 1, text, banner)
+        else:
+            ws.write(last_row - 1, 0, text, banner)
+    return ws
+
+
+def write_sheet(wb, name: str, df: pd.DataFrame, index: bool = True, color_scale_column: str = None,
+                bold_labels: tuple = (), banners: tuple = (), max_width: int = None, number_formats: dict = None):
+    """
+    Write one DataFrame into a new sheet of wb: an xlsxwriter workbook (streamed) or an openpyxl one.
+      number_formats:     {column: Excel number format}; other float columns use DECIMAL_FORMAT
+      color_scale_column: header whose data cells get the red-yellow-green scale
+      bold_labels:        rows whose first cell equals one of these are written in bold (e.g. 'TOTAL')
+      banners:            text lines appended below the table as merged yellow banners
+    """
+    if hasattr(wb, 'add_worksheet'):
+        return _stream_sheet(wb, name, df, index, color_scale_column, bold_labels, banners, max_width,
+                             number_formats)
+    from openpyxl.utils import get_column_letter
+
+    style = _styles()
+    ws = wb.create_sheet(title=name)
+    headers = ([df.index.name or ''] if index else []) + [str(col) for col in df.columns]
+    n_cols = len(headers)
+
+    # Widths must be set before the first row is streamed
+    formats = _number_formats(df, number_formats)
+    for idx, width in enumerate(column_widths(df, index=index, max_width=max_width, number_formats=formats), 1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    column_formats = ([None] if index else []) + [formats.get(col) for col in df.columns]
+
+    ws.append([_styled(ws, h, style['header_font'], style['header_border'], style['header_alignment'])
+               for h in headers])
+    for values in _cell_values(df, index):
+        font = style['header_font'] if values and values[0] in bold_labels else None
+        for pos, (value, fmt) in enumerate(zip(values, column_formats)):
+            fmt = fmt if isinstance(value, float) else None
+            if index and pos == 0:
+                values[0] = _styled(ws, value, style['header_font'], style['header_border'])
+            elif font or fmt:
+                values[pos] = _styled(ws, value, font, number_format=fmt)
+        ws.append(values)
+
+    last_row = len(df) + 1
+    if color_scale_column in headers and len(df):
+        col_letter = get_column_letter(headers.index(color_scale_column) + 1)
+        ws.conditional_formatting.add(f"{col_letter}2:{col_letter}{last_row}", color_scale_rule())
+
+    for text in banners:
+        ws.append([])
+        last_row += 2
+        ws.append([_styled(ws, text, style['header_font'], fill=style['banner_fill'])])
+        ref = f"A{last_row}:{get_column_letter(n_cols)}{last_row}"
+        if hasattr(ws, 'merge_cells'):
+            ws.merge_cells(ref)
+        else:  # write-only sheets only collect the range, which is written out on save
+            ws.merged_cells.add(ref)
+    return ws
+
+
+def write_fan_chart_sheet(wb, name: str, df: pd.DataFrame, band_columns: list, max_width: int = None,
+                          chart_rows: int = 16):
+    """
+    write_sheet for a long table of (label, x, bands...) rows, grouped by label, plus one line chart
+    per label to the right of the table: the band_columns over x, i.e. a fan chart of that label.
+    """
+    ws = write_sheet(wb, name, df, index=False, max_width=max_width)
+    headers = [str(col) for col in df.columns]
+    labels = df.iloc[:, 0].to_numpy()
+    starts = [i for i in range(len(labels)) if i == 0 or labels[i] != labels[i - 1]]
+    groups = list(zip(starts, starts[1:] + [len(labels)]))
+
+    if hasattr(wb, 'add_worksheet'):
+        from xlsxwriter.utility import xl_col_to_name
+
+        anchor_col = xl_col_to_name(len(headers) + 1)
+        for k, (first, last) in enumerate(groups):
+            chart = wb.add_chart({'type': 'line'})
+            chart.set_title({'name': str(labels[first])})
+            chart.set_y_axis({'name': 'P/L (%)'})
+            for col in band_columns:
+                chart.add_series({'name': col, 'categories': [name, first + 1, 1, last, 1],
+                                  'values': [name, first + 1, headers.index(col), last, headers.index(col)]})
+            ws.insert_chart(f"{anchor_col}{1 + k * chart_rows}", chart)
+        return ws
+
+    from openpyxl.chart import LineChart, Reference, Series
+    from openpyxl.utils import get_column_letter
+
+    anchor_col = get_column_letter(len(headers) + 2)
+    for k, (first, last) in enumerate(groups):
+        chart = LineChart()
+        chart.title = str(labels[first])
+        chart.y_axis.title = 'P/L (%)'
+        for col in band_columns:
+            values = Reference(ws, min_col=headers.index(col) + 1, min_row=first + 2, max_row=last + 1)
+            chart.series.append(Series(values, title=col))
+        chart.set_categories(Reference(ws, min_col=2, min_row=first + 2, max_row=last + 1))
+        ws.add_chart(chart, f"{anchor_col}{1 + k * chart_rows}")
+    return ws
+
+
+def best_performers(dashboard_df: pd.DataFrame, label_col: str, value_col: str = 'P/L (%)'):
+    """
+    ((label, value) of the best individual asset, (label, value) of the best TOP-N basket).
+    Either is None when there are no such rows.
+    """
+    numeric = pd.to_numeric(dashboard_df[value_col], errors='coerce')
+    labels = dashboard_df[label_col].astype(str)
+    is_top = labels.str.startswith('TOP')
+    is_asset = ~is_top & ~labels.isin(['TOTAL', '', 'nan']) & numeric.notna()
+
+    def best(selector):
+        if not selector.any():
+            return None
+        i = numeric[selector].idxmax()
+        return labels[i], float(numeric[i])
+
+    return best(is_asset), best(is_top & numeric.notna())
+
+
+def write_report(path: str, asset_sheets: dict, dashboard_df: pd.DataFrame, label_col: str,
+                 banners: tuple = (), extra_sheets: dict = None, max_width: int = None, streaming: bool = True,
+                 number_formats: dict = None, dashboard_formats: dict = None, fan_charts: dict = None):
+    """
+    Write the per-asset sheets, the Dashboard (bold TOTAL row, color scale on P/L (%), banners)
+    and any extra summary sheets. streaming=True streams the rows to disk with xlsxwriter's
+    constant_memory mode, so memory stays flat as row counts grow; streaming=False builds the
+    workbook in memory with openpyxl. number_formats applies to the per-asset sheets,
+    dashboard_formats to the Dashboard. fan_charts is {sheet name: (DataFrame, band columns)}
+    for write_fan_chart_sheet.
+    """
+    if streaming:
+        import xlsxwriter
+
+        wb = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+    else:
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        wb.remove(wb.active)
+
+    for name, df in asset_sheets.items():
+        with telemetry.stage('xlsx sheet', asset=name):
+            write_sheet(wb, name, df, index=True, color_scale_column='portfolio_pct_change_value',
+                        max_width=max_width, number_formats=number_formats)
+    write_sheet(wb, 'Dashboard', dashboard_df, index=False, color_scale_column='P/L (%)',
+                bold_labels=('TOTAL',), banners=banners, max_width=max_width, number_formats=dashboard_formats)
+    for name, df in (extra_sheets or {}).items():
+        write_sheet(wb, name, df, index=False, max_width=max_width)
+    for name, (df, band_columns) in (fan_charts or {}).items():
+        write_fan_chart_sheet(wb, name, df, band_columns, max_width=max_width)
+
+    with telemetry.stage('xlsx save'):
+        if streaming:
+            wb.close()
+        else:
+            wb.save(path)
@@ -0,0 +1,40 @@
+import pandas as pd
+
+# -----------------------------
+# Daily -> weekly/monthly bars
+# -----------------------------
+# Binance and Yahoo both open weekly bars on Monday and monthly bars on the 1st,
+# and label each bar with its open date, so bins are closed and labelled on the left.
+RESAMPLE_RULES = {
+    "daily": None,
+    "weekly": "W-MON",
+    "monthly": "MS"
+}
+
+
+def resample_ohlcv(df: pd.DataFrame, rule, columns=("open", "high", "low", "close", "volume")) -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars to a coarser rule: open first, high max, low min, close last, volume sum.
+    rule=None returns the frame unchanged. The index may be datetimes or plain dates; the output keeps the same kind.
+    """
+    if rule is None or df.empty:
+        return df
+    o, h, l, c, v = columns
+    dated = not isinstance(df.index, pd.DatetimeIndex)
+    src = df.set_axis(pd.to_datetime(df.index)) if dated else df
+
+    out = src.resample(rule, closed="left", label="left").agg({o: "first", h: "max", l: "min", c: "last", v: "sum"})
+    out = out.dropna(subset=[c])  # calendar gaps (weekends/holidays spanning a whole bin)
+
+    if dated:
+        out.index = out.index.date
+    out.index.name = df.index.name
+    return out
+
+
+def resample_frequencies(daily: pd.DataFrame, rules: dict = None, columns=("open", "high", "low", "close", "volume")) -> dict:
+    """
+    Build every frequency from a single daily frame -> {freq_str: DataFrame}.
+    """
+    rules = RESAMPLE_RULES if rules is None else rules
+    return {freq_str: resample_ohlcv(daily, rule, columns) for freq_str, rule in rules.items()}
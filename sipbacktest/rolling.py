@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Rolling-start (entry date) analysis
+# -----------------------------
+# For a start bar k held to the last bar, the SIP owns sum(amount / close[k:]) units and has
+# invested amount * (number of bars from k). Both are suffix sums, so every start date of every
+# asset is evaluated with two reversed cumsums instead of one backtest per start.
+
+PERCENTILES = (5, 25, 50, 75, 95)
+PNL_TOLERANCE = 1e-9  # |P/L%| below this is float rounding of an exact 0 (e.g. a single buy), not a gain or loss
+
+
+def rolling_start_pnl(close: np.ndarray, amount: float) -> np.ndarray:
+    """
+    (time x asset) close matrix -> (time x asset) final P/L% for a SIP started at each bar
+    and held to the asset's last bar. NaN where the asset has no bar; values within
+    PNL_TOLERANCE of 0 are exactly 0.
+    """
+    mask = np.isfinite(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        units = np.divide(amount, close, out=np.zeros_like(close), where=mask)
+        suffix_units = np.cumsum(units[::-1], axis=0)[::-1]
+        suffix_invested = np.cumsum(mask[::-1], axis=0, dtype=np.float64)[::-1] * amount
+
+        last_row = close.shape[0] - 1 - np.argmax(mask[::-1], axis=0)
+        last_close = close[last_row, np.arange(close.shape[1])]
+
+        pnl = np.divide(suffix_units * last_close - suffix_invested, suffix_invested,
+                        out=np.full_like(close, np.nan), where=mask & (suffix_invested > 0))
+    pnl *= 100
+    # Entering at the last bar breaks even; snap that rounding noise to 0 so it neither ranks as
+    # the worst entry nor flips the profitable-entry count
+    pnl[np.abs(pnl) < PNL_TOLERANCE] = 0.0
+    return pnl
+
+
+def entry_date_sensitivity(index, names: list, pnl: np.ndarray, label: str) -> pd.DataFrame:
+    """
+    Summarise rolling_start_pnl per asset: best/worst entry date, percentile bands and
+    the share of entry dates that ended in profit. One row per asset, in `names` order.
+    """
+    dates = pd.Index(index)
+    if isinstance(dates, pd.DatetimeIndex):
+        dates = pd.Index(dates.date)
+    valid = np.isfinite(pnl)
+    filled_low = np.where(valid, pnl, -np.inf)
+    filled_high = np.where(valid, pnl, np.inf)
+    best = np.argmax(filled_low, axis=0)
+    worst = np.argmin(filled_high, axis=0)
+    cols = np.arange(pnl.shape[1])
+    bands = np.nanpercentile(pnl, PERCENTILES, axis=0)
+    entries = valid.sum(axis=0)
+    profitable = np.divide((pnl > 0).sum(axis=0) * 100.0, entries, out=np.zeros(len(cols)), where=entries > 0)
+
+    return pd.DataFrame({
+        label: names,
+        'Entries': entries,
+        'Best Entry': dates[best],
+        'Best P/L (%)': pnl[best, cols],
+        'Worst Entry': dates[worst],
+        'Worst P/L (%)': pnl[worst, cols],
+        **{f'P{p} (%)': bands[i] for i, p in enumerate(PERCENTILES)},
+        'Profitable Entries (%)': profitable
+    })
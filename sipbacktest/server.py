@@ -0,0 +1,254 @@
+import argparse
+import datetime
+import functools
+import json
+import math
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from sipbacktest.backtest import CRYPTO_PRICES, sip_backtest_all
+from sipbacktest.cache import OHLCVCache
+from sipbacktest.cli import crypto_symbols
+from sipbacktest.dashboard import add_metrics, basket_members, build_dashboard_rows, summary_row
+from sipbacktest.engine import align_closes
+from sipbacktest.metrics import sip_metrics
+from sipbacktest.pipeline import ASSET_CLASSES, TOTAL_SIP_PER_PERIOD
+from sipbacktest.resample import RESAMPLE_RULES, resample_ohlcv
+from sipbacktest.sources import YAHOO_SOURCE, ohlcv_frame
+
+# -----------------------------
+# Local query service
+# -----------------------------
+# Ad-hoc SIP questions over HTTP/JSON, answered from the local OHLCV cache only (no network):
+#   GET  /symbols   cached series: source, symbol, timeframe, bars, first and last date
+#   GET  /sip?symbols=ETH,SOL&amount=50&frequency=weekly&start=2023-01-01
+#                   [&end=YYYY-MM-DD][&source=binance|yahoo][&metrics=1]
+#   POST /sip       the same fields as a JSON object (symbols as a list or a comma-separated string)
+#   GET  /stats     hit/miss counts of the history and answer caches
+# /sip answers with the Dashboard rows of the query: every asset, TOTAL and TOP n, where
+# amount is invested per buy across all symbols (split equally, as in pipeline.run).
+#
+# Daily histories stay in memory in an LRU keyed by (source, symbol, last cached bar), and
+# finished answers are memoized as encoded JSON by their normalized parameters plus those
+# last-bar stamps. Overlapping queries share the loaded histories, repeated ones skip the work
+# entirely, and a cache refreshed by the nightly run is picked up on the next query because
+# its last bar changed. Requests run on their own threads; the SQLite cache opens a connection
+# per call and lru_cache is thread-safe (two simultaneous misses of one key both compute it).
+
+DEFAULT_PORT = 8765
+HISTORY_SLOTS = 64    # daily histories kept in memory
+RESULT_SLOTS = 1024   # memoized answers
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if hasattr(value, 'item'):  # numpy scalars
+        return _json_value(value.item())
+    return value
+
+
+def _records(df: pd.DataFrame) -> list:
+    return [{key: _json_value(value) for key, value in row.items()} for row in df.to_dict('records')]
+
+
+def _text(params: dict, key: str, default=None):
+    value = params.get(key)
+    if value in (None, ''):
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    return value
+
+
+def _date(params: dict, key: str):
+    value = _text(params, key)
+    return None if value is None else datetime.date.fromisoformat(value).isoformat()
+
+
+def _flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if not isinstance(value, (str, int)):
+        raise ValueError("metrics must be a boolean")
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+class QueryService:
+    """
+    SIP queries over an OHLCVCache, with LRU-cached histories and memoized answers.
+    """
+
+    def __init__(self, cache_file: str, history_slots: int = HISTORY_SLOTS, result_slots: int = RESULT_SLOTS,
+                 timeframe: str = '1d'):
+        self.cache = OHLCVCache(cache_file)
+        self.timeframe = timeframe
+        self.history = functools.lru_cache(maxsize=history_slots)(self._load_history)
+        self._answer = functools.lru_cache(maxsize=result_slots)(self._compute)
+
+    def _load_history(self, source: str, symbol: str, last_ts: int) -> pd.DataFrame:
+        # last_ts only keys the LRU entry, so a refreshed cache is read again
+        return ohlcv_frame(self.cache.load(source, symbol, self.timeframe))
+
+    def symbols(self) -> bytes:
+        rows = [{'source': source, 'symbol': symbol, 'timeframe': timeframe, 'bars': bars,
+                 'first': pd.to_datetime(first, unit='ms').date().isoformat(),
+                 'last': pd.to_datetime(last, unit='ms').date().isoformat()}
+                for source, symbol, timeframe, bars, first, last in self.cache.series()]
+        return json.dumps(rows).encode()
+
+    def sip(self, params: dict) -> bytes:
+        """
+        Encoded JSON answer for /sip parameters; ValueError on invalid ones.
+        """
+        symbols = params.get('symbols') or []
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        if not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols):
+            raise ValueError("symbols must be a list of strings or a comma-separated string")
+        symbols = tuple(s.strip() for s in symbols if s.strip())
+        if not symbols:
+            raise ValueError("symbols is required, e.g. symbols=ETH,SOL")
+        source = _text(params, 'source', 'binance')
+        frequency = _text(params, 'frequency', 'daily')
+        if frequency not in RESAMPLE_RULES:
+            raise ValueError(f"frequency must be one of {list(RESAMPLE_RULES)}")
+        amount = params.get('amount', TOTAL_SIP_PER_PERIOD)
+        if isinstance(amount, bool) or not isinstance(amount, (str, int, float)):
+            raise ValueError("amount must be a positive number")
+        amount = float(amount)
+        if not (math.isfinite(amount) and amount > 0):
+            raise ValueError("amount must be a positive number")
+
+        # name -> cached market symbol: ETH -> ETH/USDT on exchanges, tickers as they are on Yahoo
+        markets = {name: name for name in symbols} if source == YAHOO_SOURCE else crypto_symbols(list(symbols))
+        stamps = tuple(self.cache.last_timestamp(source, market, self.timeframe) for market in markets.values())
+        return self._answer(source, tuple(markets.items()), amount, frequency, _date(params, 'start'),
+                            _date(params, 'end'), _flag(params.get('metrics', False)), stamps)
+
+    def _compute(self, source: str, markets: tuple, amount: float, frequency: str, start, end, metrics: bool,
+                 stamps: tuple) -> bytes:
+        config = ASSET_CLASSES['stocks' if source == YAHOO_SOURCE else 'crypto']
+        label = config['label']
+        frames, missing = {}, []
+        for (name, market), last_ts in zip(markets, stamps):
+            daily = self.history(source, market, last_ts) if last_ts is not None else None
+            if daily is not None and start:
+                daily = daily[daily.index >= pd.Timestamp(start)]
+            if daily is not None and end:
+                daily = daily[daily.index < pd.Timestamp(end) + pd.Timedelta(days=1)]
+            if daily is None or daily.empty:
+                missing.append(name)
+                continue
+            frames[name] = resample_ohlcv(daily, RESAMPLE_RULES[frequency])
+
+        sip_amount = amount / len(markets)
+        results = sip_backtest_all(frames, sip_amount, prices=CRYPTO_PRICES, units=config['units'])
+        rows = [summary_row(label, name, results[name]) for name, _ in markets if name in results]
+        dashboard = []
+        if rows:
+            dashboard_df = build_dashboard_rows(rows, label_col=label, rank_top_n=config['rank_top_n'])
+            if metrics:
+                index, aligned, close = align_closes(frames, 'close')
+                baskets = basket_members(rows, label, config['rank_top_n'])
+                dashboard_df = add_metrics(dashboard_df, sip_metrics(index, aligned, close, sip_amount, baskets),
+                                           label)
+            dashboard = _records(dashboard_df[dashboard_df[label].astype(str) != ''])  # without the spacer row
+
+        query = {'source': source, 'symbols': [name for name, _ in markets], 'amount': amount,
+                 'amount_per_symbol': sip_amount, 'frequency': frequency, 'start': start, 'end': end}
+        return json.dumps({'query': query, 'dashboard': dashboard, 'missing': missing}).encode()
+
+    def cache_info(self) -> dict:
+        return {'histories': self.history.cache_info()._asdict(), 'results': self._answer.cache_info()._asdict()}
+
+
+def make_handler(service: QueryService, verbose: bool = False):
+    """
+    BaseHTTPRequestHandler class serving `service`.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self, params: dict):
+            path = urlparse(self.path).path.rstrip('/')
+            try:
+                if path == '/sip':
+                    return self._send(200, service.sip(params))
+                if path == '/symbols':
+                    return self._send(200, service.symbols())
+                if path == '/stats':
+                    return self._send(200, json.dumps(service.cache_info()).encode())
+                self._send(404, json.dumps({'error': f"unknown path {path!r}"}).encode())
+            except (ValueError, TypeError) as e:
+                self._send(400, json.dumps({'error': str(e)}).encode())
+            except Exception as e:  # answer with a JSON 500 instead of dropping the connection
+                self.log_error("%s %s failed: %r", self.command, path, e)
+                self._send(500, json.dumps({'error': f"internal error: {type(e).__name__}"}).encode())
+
+        def do_GET(self):
+            params = {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+            self._route(params)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b'{}')
+            except json.JSONDecodeError as e:
+                return self._send(400, json.dumps({'error': f"invalid JSON body: {e}"}).encode())
+            if not isinstance(params, dict):
+                return self._send(400, json.dumps({'error': "the JSON body must be an object"}).encode())
+            self._route(params)
+
+        def log_request(self, code='-', size='-'):
+            if verbose:  # errors are always logged, one line per request only with verbose
+                super().log_request(code, size)
+
+    return Handler
+
+
+def make_server(service: QueryService, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Threaded HTTP server for `service` (one thread per request); call serve_forever() on it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(service, verbose))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve SIP queries over HTTP/JSON from the local OHLCV cache.")
+    parser.add_argument('--cache', default='data_cache/ohlcv.sqlite')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--histories', type=int, default=HISTORY_SLOTS, help="daily histories kept in memory")
+    parser.add_argument('--results', type=int, default=RESULT_SLOTS, help="memoized answers kept in memory")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.cache):
+        parser.error(f"no OHLCV cache at {args.cache}: run a backtest with the cache enabled first")
+
+    service = QueryService(args.cache, args.histories, args.results)
+    server = make_server(service, args.host, args.port, args.verbose)
+    print(f"Serving SIP queries on http://{args.host}:{server.server_port}/sip (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import datetime
+
+import pandas as pd
+
+from sipbacktest import telemetry
+from sipbacktest.acquire import fetch_crypto, fetch_stocks
+from sipbacktest.cache import top_up
+from sipbacktest.paginate import fetch_ohlcv_history
+
+# -----------------------------
+# Data sources
+# -----------------------------
+# Daily OHLCV for crypto (ccxt/Binance) and stocks (yfinance), served from the local
+# OHLCV cache when one is given. Only daily bars are fetched; weekly/monthly are resampled.
+# ccxt and yfinance are imported on first fetch, not when this module is imported.
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+STOCK_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Cache source key for Yahoo bars (crypto bars use the ccxt exchange id)
+YAHOO_SOURCE = "yahoo"
+
+# Minimum seconds between two Yahoo downloads, shared by all concurrent tickers
+YAHOO_MIN_INTERVAL = 0.5
+
+# yfinance period suffix -> days, used to size the cached history window
+PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+
+
+# -----------------------------
+# Crypto (ccxt)
+# -----------------------------
+def make_exchange(exchange_id: str = 'binance'):
+    """
+    Synchronous ccxt exchange instance, e.g. for fetch_ohlcv.
+    """
+    import ccxt
+
+    return getattr(ccxt, exchange_id)()
+
+
+def fetch_ohlcv(exchange, symbol: str, timeframe: str, limit: int, cache=None) -> list:
+    """
+    Last `limit` bars of symbol as [ts, open, high, low, close, volume] rows.
+    Bars come from the cache when given, and only what is newer than the last cached bar is
+    asked from the exchange. Both paths page through `since` cursors, so `limit` is not
+    bounded by the exchange's per-request cap.
+    """
+    since = exchange.milliseconds() - limit * exchange.parse_timeframe(timeframe) * 1000
+    fetch_full = lambda: fetch_ohlcv_history(exchange, symbol, timeframe, since)
+    if cache is None:
+        return fetch_full()[-limit:]
+    rows = top_up(
+        cache, exchange.id, symbol, timeframe, limit,
+        fetch_full=fetch_full,
+        fetch_since=lambda ts: fetch_ohlcv_history(exchange, symbol, timeframe, ts)
+    )
+    return rows[-limit:]
+
+
+def ohlcv_frame(rows: list) -> pd.DataFrame:
+    """
+    ccxt OHLCV rows -> DataFrame indexed by bar open time.
+    """
+    df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df.set_index('timestamp')
+
+
+def fetch_crypto_daily(symbols: dict, days: int, cache=None, concurrency: int = 8):
+    """
+    ({name: daily OHLCV DataFrame}, {name: error}) for {name: 'BASE/QUOTE'} symbols,
+    all fetched concurrently. Names that failed are left out of the frames.
+    """
+    rows, errors = fetch_crypto(symbols, '1d', days, cache=cache, concurrency=concurrency)
+    return {name: ohlcv_frame(rows[name]) for name in symbols if name in rows}, errors
+
+
+# -----------------------------
+# Stocks (yfinance)
+# -----------------------------
+def period_to_days(period: str) -> int:
+    """
+    Convert a yfinance period string ("3y", "6mo", "ytd", "max", ...) to a number of days.
+    "ytd" counts the days since Jan 1 of the current year.
+    """
+    if period == "max":
+        return 100 * 366
+    if period == "ytd":
+        today = datetime.date.today()
+        return (today - datetime.date(today.year, 1, 1)).days + 1
+    for suffix, days in PERIOD_DAYS.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return int(period[:-len(suffix)]) * days
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def normalize_ohlc(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flatten a yf.download frame; return DataFrame with Date as index (date only) and OHLCV columns.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame()
+    # Ensure flat columns and date index (date only)
+    df = df.reset_index()
+    df.columns = [c[0] if isinstance(c, tuple) else c for c in df.columns]
+    # Standardize column names just in case
+    rename_map = {"Adj Close": "AdjClose"}
+    df = df.rename(columns=rename_map)
+    # Keep date only (no time) for index
+    df["Date"] = pd.to_datetime(df["Date"]).dt.date
+    df = df.set_index("Date")
+    # Ensure required columns exist
+    for needed in STOCK_COLUMNS:
+        if needed not in df.columns:
+            df[needed] = pd.NA
+    return df[STOCK_COLUMNS].dropna()
+
+
+def ohlc_to_rows(df: pd.DataFrame) -> list:
+    """
+    DataFrame from normalize_ohlc -> [ts_ms, open, high, low, close, volume] rows for the cache.
+    """
+    if df.empty:
+        return []
+    ts = pd.to_datetime(pd.Index(df.index)).asi8 // 10**6
+    values = df[STOCK_COLUMNS].astype(float).values.tolist()
+    return [[int(t), *v] for t, v in zip(ts, values)]
+
+
+def rows_to_ohlc(rows: list) -> pd.DataFrame:
+    """
+    Inverse of ohlc_to_rows.
+    """
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows, columns=["Date", *STOCK_COLUMNS])
+    df["Date"] = pd.to_datetime(df["Date"], unit="ms").dt.date
+    return df.set_index("Date").dropna()
+
+
+def fetch_ohlc(ticker: str, interval: str, period: str, cache=None, download=None) -> pd.DataFrame:
+    """
+    Fetch OHLCV from Yahoo Finance; return DataFrame with Date as index (date only) and flat columns.
+    With a cache, only bars after the last cached date are downloaded.
+    download defaults to yfinance.download. Raises ValueError when Yahoo returns no bars.
+    """
+    if download is None:
+        import yfinance as yf
+        download = yf.download
+
+    def fetch(**window):
+        # yf.download reports failures as an empty frame; raise so the caller's retry/backoff applies.
+        # A top-up starts at the last cached bar, so it is never legitimately empty either.
+        df = normalize_ohlc(download(ticker, interval=interval, auto_adjust=False, progress=False, **window))
+        if df.empty:
+            raise ValueError(f"Yahoo returned no bars for {ticker} ({window})")
+        return df
+
+    if cache is None:
+        df = fetch(period=period)
+        telemetry.fetched(ticker, df)
+        return df
+
+    def fetch_full():
+        rows = ohlc_to_rows(fetch(period=period))
+        telemetry.fetched(ticker, rows)
+        telemetry.count('cache misses', asset=ticker)
+        return rows
+
+    def fetch_since(ts):
+        rows = ohlc_to_rows(fetch(start=pd.to_datetime(ts, unit="ms").date()))
+        telemetry.fetched(ticker, rows)
+        telemetry.count('cache hits', asset=ticker)
+        return rows
+
+    days = period_to_days(period)
+    rows = top_up(cache, YAHOO_SOURCE, ticker, interval, days, fetch_full, fetch_since)
+    if rows:
+        if period == "ytd":  # like yfinance: from Jan 1 of the latest bar's year
+            last = pd.to_datetime(rows[-1][0], unit="ms")
+            window_start = int(pd.Timestamp(year=last.year, month=1, day=1).value // 1_000_000)
+        else:
+            window_start = rows[-1][0] - days * 86_400_000
+        rows = [r for r in rows if r[0] >= window_start]
+    return rows_to_ohlc(rows)
+
+
+def fetch_stocks_daily(tickers, interval: str = "1d", period: str = "3y", cache=None, concurrency: int = 8,
+                       min_interval: float = YAHOO_MIN_INTERVAL):
+    """
+    ({ticker: daily OHLC DataFrame}, {ticker: error}), one concurrent download per ticker.
+    Downloads start at least min_interval seconds apart; a failed or empty download is retried
+    with backoff, and the ticker only lands in the errors once its retries are used up.
+    """
+    return fetch_stocks(
+        tickers, lambda ticker: fetch_ohlc(ticker, interval=interval, period=period, cache=cache),
+        concurrency=concurrency, min_interval=min_interval
+    )
@@ -0,0 +1,188 @@
+import datetime
+import json
+import os
+import shutil
+
+import pandas as pd
+
+# -----------------------------
+# Columnar results store
+# -----------------------------
+# Per-asset frames are written at full precision, one file per frequency/asset in a
+# hive-style layout, with summary tables (Dashboard, ...) next to them:
+#
+#   <root>/frequency=daily/asset=BTC/part-0.parquet      all bars but the last
+#   <root>/frequency=daily/asset=BTC/part-1.parquet      bars appended by later updates
+#   <root>/frequency=daily/asset=BTC/part-tail.parquet   the last (possibly still open) bar
+#   <root>/frequency=daily/dashboard.parquet
+#   <root>/frequency=daily/_checkpoint.json              running SIP state for updates
+#
+# The last bar sits in its own file because it is recomputed on every update (today's
+# candle, the current week/month), so appending never rewrites the earlier parts.
+# Parquet and Arrow IPC need pyarrow (imported only when used); CSV works with pandas alone.
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow', 'csv': 'csv'}
+CHECKPOINT_FILE = '_checkpoint.json'
+TAIL_PART = 'part-tail'
+
+
+def _require_pyarrow(fmt: str):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"The '{fmt}' results format needs pyarrow: pip install pyarrow") from e
+
+
+def _slug(name: str) -> str:
+    return '_'.join(name.lower().split())
+
+
+def _columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make a frame safe for typed columnar formats: the index becomes a column, blanks become
+    nulls, and mixed object columns are coerced to dates, numbers or strings.
+    """
+    out = df.reset_index() if df.index.name is not None else df.reset_index(drop=True)
+    for col in out.columns:
+        if out[col].dtype != object:
+            continue
+        values = out[col].replace('', None)
+        present = values.dropna()
+        if present.map(lambda v: isinstance(v, (datetime.date, pd.Timestamp))).all() and len(present):
+            out[col] = pd.to_datetime(values)
+        elif present.map(lambda v: isinstance(v, (int, float))).all() and len(present):
+            out[col] = pd.to_numeric(values)
+        else:
+            out[col] = values.astype('string')
+    return out
+
+
+def _write(df: pd.DataFrame, path: str, fmt: str):
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    elif fmt == 'arrow':
+        df.to_feather(path)  # Feather v2 is the Arrow IPC file format
+    else:
+        df.to_csv(path, index=False)
+
+
+def _read(path: str, fmt: str) -> pd.DataFrame:
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True).to_pandas()
+    if fmt == 'arrow':
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all().to_pandas()
+    return pd.read_csv(path)
+
+
+def _check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown results format: {fmt} (expected one of {sorted(FORMATS)})")
+    if fmt != 'csv':
+        _require_pyarrow(fmt)
+
+
+def _part_numbers(folder: str, ext: str) -> list:
+    names = os.listdir(folder) if os.path.isdir(folder) else []
+    stems = (name[len('part-'):-len(ext) - 1] for name in names if name.startswith('part-') and name.endswith(ext))
+    return sorted(int(stem) for stem in stems if stem.isdigit())
+
+
+def _write_asset(folder: str, df: pd.DataFrame, fmt: str, part: int):
+    # Everything but the last bar becomes part-<part>; the last bar replaces part-tail
+    ext = FORMATS[fmt]
+    os.makedirs(folder, exist_ok=True)
+    table = _columnar(df)
+    if len(table) > 1:
+        _write(table.iloc[:-1], os.path.join(folder, f'part-{part}.{ext}'), fmt)
+    _write(table.iloc[-1:], os.path.join(folder, f'{TAIL_PART}.{ext}'), fmt)
+
+
+def _write_tables(partition: str, tables: dict, fmt: str):
+    os.makedirs(partition, exist_ok=True)
+    for name, df in (tables or {}).items():
+        _write(_columnar(df), os.path.join(partition, f'{_slug(name)}.{FORMATS[fmt]}'), fmt)
+
+
+def write_results(root: str, frequency: str, asset_frames: dict, tables: dict = None, fmt: str = 'parquet'):
+    """
+    Replace the `frequency` partition under `root` with the given per-asset frames and
+    summary tables ({'Dashboard': df, ...}).
+    """
+    _check_format(fmt)
+    partition = os.path.join(root, f'frequency={frequency}')
+    shutil.rmtree(partition, ignore_errors=True)
+    for asset, df in asset_frames.items():
+        _write_asset(os.path.join(partition, f'asset={asset}'), df, fmt, part=0)
+    _write_tables(partition, tables, fmt)
+
+
+def append_results(root: str, frequency: str, asset_frames: dict, tables: dict = None, fmt: str = 'parquet'):
+    """
+    Append per-asset rows to an existing `frequency` partition. Each frame starts with the
+    recomputed last bar (replacing the stored part-tail) followed by the new bars; earlier
+    parts are never rewritten. Summary tables are replaced.
+    """
+    _check_format(fmt)
+    partition = os.path.join(root, f'frequency={frequency}')
+    for asset, df in asset_frames.items():
+        if df.empty:
+            continue
+        folder = os.path.join(partition, f'asset={asset}')
+        parts = _part_numbers(folder, FORMATS[fmt])
+        _write_asset(folder, df, fmt, part=parts[-1] + 1 if parts else 0)
+    _write_tables(partition, tables, fmt)
+
+
+def write_checkpoint(root: str, frequency: str, checkpoint: dict):
+    """
+    Save the running SIP state of a `frequency` partition (plain JSON values).
+    """
+    partition = os.path.join(root, f'frequency={frequency}')
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, CHECKPOINT_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(path + '.tmp', path)  # never leave a half-written checkpoint behind
+
+
+def load_checkpoint(root: str, frequency: str):
+    """
+    The checkpoint saved by write_checkpoint, or None if the partition has none.
+    """
+    path = os.path.join(root, f'frequency={frequency}', CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_results(root: str, frequency: str = None, asset: str = None, fmt: str = 'parquet',
+                 tail_only: bool = False) -> pd.DataFrame:
+    """
+    Read per-asset results back as one frame with 'frequency' and 'asset' columns,
+    optionally restricted to one frequency and/or asset. tail_only reads just the last bar.
+    """
+    ext = FORMATS[fmt]
+    parts = []
+    frequencies = [frequency] if frequency else sorted(
+        d.split('=', 1)[1] for d in os.listdir(root) if d.startswith('frequency='))
+    for freq in frequencies:
+        partition = os.path.join(root, f'frequency={freq}')
+        assets = [asset] if asset else sorted(
+            d.split('=', 1)[1] for d in os.listdir(partition) if d.startswith('asset='))
+        for name in assets:
+            folder = os.path.join(partition, f'asset={name}')
+            files = [] if tail_only else [f'part-{n}.{ext}' for n in _part_numbers(folder, ext)]
+            for file in files + [f'{TAIL_PART}.{ext}']:
+                parts.append(_read(os.path.join(folder, file), fmt).assign(frequency=freq, asset=name))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def load_table(root: str, frequency: str, name: str = 'Dashboard', fmt: str = 'parquet') -> pd.DataFrame:
+    """
+    Read one summary table (e.g. the Dashboard) of a frequency.
+    """
+    return _read(os.path.join(root, f'frequency={frequency}', f'{_slug(name)}.{FORMATS[fmt]}'), fmt)
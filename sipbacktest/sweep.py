@@ -0,0 +1,159 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from sipbacktest.engine import align_closes, sip_matrix
+from sipbacktest.metrics import _ffill
+from sipbacktest.resample import RESAMPLE_RULES
+
+# -----------------------------
+# Parameter sweep runner
+# -----------------------------
+# The daily close matrix is placed in shared memory once; worker processes attach to it by
+# name, so scenarios only ship a handful of parameters, never the prices themselves.
+# Each scenario is (sip_amount, frequency, start_date, basket) and yields one tidy row.
+
+RESULT_COLUMNS = ['sip_amount', 'frequency', 'start_date', 'basket', 'buys',
+                  'invested', 'value', 'pnl', 'pnl_pct']
+
+_shared = {}
+
+
+def frequency_rows(index: pd.DatetimeIndex, rules: dict = None) -> dict:
+    """
+    Row positions of the last daily bar in each resample bin, per frequency. Taking the close
+    at those rows is the same as resampling closes with 'last'.
+    """
+    rules = RESAMPLE_RULES if rules is None else rules
+    positions = pd.Series(np.arange(len(index)), index=index)
+    rows = {}
+    for freq_str, rule in rules.items():
+        if rule is None:
+            rows[freq_str] = positions.to_numpy()
+        else:
+            rows[freq_str] = positions.resample(rule, closed='left', label='left').last().dropna().to_numpy(dtype=np.int64)
+    return rows
+
+
+def _attach(shm_name: str, shape: tuple, dates: np.ndarray, names: list, rows: dict):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _shared.update(
+        shm=shm,
+        close=np.ndarray(shape, dtype=np.float64, buffer=shm.buf),
+        dates=dates,
+        columns={name: j for j, name in enumerate(names)},
+        rows=rows
+    )
+
+
+def _run_chunk(scenarios: list) -> list:
+    close, dates, columns, all_rows = _shared['close'], _shared['dates'], _shared['columns'], _shared['rows']
+    out = []
+    for sip_amount, frequency, start_date, basket in scenarios:
+        rows = all_rows[frequency]
+        if start_date is not None:
+            rows = rows[dates[rows] >= np.datetime64(start_date, 'ns')]
+        prices = close[np.ix_(rows, [columns[name] for name in basket])]
+        result = sip_matrix(prices, sip_amount)
+
+        invested = float(result['invested'][-1].sum()) if len(rows) else 0.0
+        # held units at each asset's last close, so assets whose data ends early stay in the basket
+        value = float(np.nansum(result['cum_units'][-1] * _ffill(prices)[-1])) if len(rows) else 0.0
+        out.append((sip_amount, frequency, start_date, '+'.join(basket),
+                    int(np.isfinite(prices).sum()), invested, value, value - invested,
+                    (value - invested) / invested * 100 if invested else np.nan))
+    return out
+
+
+def build_scenarios(names: list, amounts, frequencies, starts, baskets) -> list:
+    """
+    Cartesian product of the grid. A basket is a list of asset names, or 'ALL' for every asset.
+    """
+    baskets = [tuple(names) if basket == 'ALL' else tuple(basket) for basket in baskets]
+    return list(itertools.product(amounts, frequencies, starts, baskets))
+
+
+def iter_sweep(frames: dict, scenarios: list, column: str = 'close', workers: int = None, chunksize: int = None):
+    """
+    Run scenarios over {name: daily OHLCV DataFrame} on a process pool and yield a
+    DataFrame of results per finished chunk, as soon as it is done.
+    """
+    index, names, close = align_closes(frames, column)
+    index = pd.DatetimeIndex(pd.to_datetime(index))
+    rows = frequency_rows(index)
+    workers = workers or os.cpu_count()
+    chunksize = chunksize or max(1, len(scenarios) // (workers * 4))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(close.nbytes, 1))
+    try:
+        np.ndarray(close.shape, dtype=np.float64, buffer=shm.buf)[:] = close
+        initargs = (shm.name, close.shape, index.to_numpy(dtype='datetime64[ns]'), names, rows)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=initargs) as pool:
+            futures = [pool.submit(_run_chunk, scenarios[i:i + chunksize])
+                       for i in range(0, len(scenarios), chunksize)]
+            for future in as_completed(futures):
+                yield pd.DataFrame(future.result(), columns=RESULT_COLUMNS)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def run_sweep(frames: dict, scenarios: list, **kwargs) -> pd.DataFrame:
+    """
+    Collect iter_sweep into one tidy table.
+    """
+    chunks = list(iter_sweep(frames, scenarios, **kwargs))
+    if not chunks:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def load_cached_daily(cache_file: str, source: str, symbols: list, timeframe: str = '1d') -> dict:
+    """
+    {symbol: daily OHLCV DataFrame} straight from the local OHLCV cache (no network).
+    """
+    from sipbacktest.cache import OHLCVCache
+
+    cache = OHLCVCache(cache_file)
+    frames = {}
+    for symbol in symbols:
+        df = pd.DataFrame(cache.load(source, symbol, timeframe),
+                          columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        frames[symbol] = df.set_index('timestamp')
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep SIP scenarios over cached daily prices.")
+    parser.add_argument('--cache', default='data_cache/ohlcv.sqlite')
+    parser.add_argument('--source', default='binance', help="cache source key, e.g. binance or yahoo")
+    parser.add_argument('--symbols', nargs='+', required=True)
+    parser.add_argument('--amounts', nargs='+', type=float, default=[2.0])
+    parser.add_argument('--frequencies', nargs='+', default=list(RESAMPLE_RULES), choices=list(RESAMPLE_RULES))
+    parser.add_argument('--starts', nargs='+', default=[None], help="start dates (YYYY-MM-DD)")
+    parser.add_argument('--baskets', nargs='+', default=['ALL'],
+                        help="comma-separated symbols per basket, or ALL")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='sweep_results.csv')
+    args = parser.parse_args(argv)
+
+    frames = load_cached_daily(args.cache, args.source, args.symbols)
+    baskets = [basket if basket == 'ALL' else basket.split(',') for basket in args.baskets]
+    scenarios = build_scenarios(args.symbols, args.amounts, args.frequencies, args.starts, baskets)
+
+    # Stream each finished chunk to the CSV so partial results survive an interrupted sweep
+    header = True
+    for chunk in iter_sweep(frames, scenarios, workers=args.workers):
+        chunk.to_csv(args.out, mode='w' if header else 'a', header=header, index=False)
+        header = False
+    print(f"Saved {len(scenarios)} scenarios to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
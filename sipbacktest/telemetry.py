@@ -0,0 +1,178 @@
+import contextlib
+import datetime
+import json
+import sys
+import threading
+import time
+
+# -----------------------------
+# Run telemetry
+# -----------------------------
+# Opt-in instrumentation of a run: wall time of every stage, what the fetches pulled (bars and
+# bytes), OHLCV cache hits/misses and the process's peak memory. Instrumented code reports to
+# the active RunStats through stage()/count()/fetched(); with none active (the default) these
+# return straight away, so normal runs pay nothing for them.
+#
+# Fetching and sheet writing happen per asset and are timed per asset; resampling, the SIP
+# engine, metrics and the other compute stages are batched across assets, so they are timed
+# per frequency. Fetches run on asyncio tasks and worker threads, hence the lock.
+# Bytes are the size of the bars received as JSON: the payload, not the HTTP wire size, which
+# ccxt/yfinance do not report per request. Peak memory is the process's resident high-water
+# mark (not available on Windows).
+
+COUNTER_UNITS = {'bars fetched': 'bars', 'bytes fetched': 'bytes'}  # anything else is a plain count
+
+_active = None
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process so far in MB, or None where the platform has no getrusage.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10  # bytes on macOS, KB on Linux
+
+
+class RunStats:
+    """
+    Stage timings and counters of one run. Stages are {'stage', 'frequency', 'asset', 'seconds',
+    'peak_memory_mb'} records; counters add up per (name, asset).
+    """
+
+    def __init__(self):
+        self.started = datetime.datetime.now()
+        self.frequency = ''  # default frequency of stages recorded while a scope() is open
+        self.stages = []
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, frequency: str = None, asset: str = ''):
+        frequency = self.frequency if frequency is None else frequency
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {'stage': name, 'frequency': frequency, 'asset': asset,
+                      'seconds': time.perf_counter() - start, 'peak_memory_mb': peak_memory_mb()}
+            with self._lock:
+                self.stages.append(record)
+
+    def count(self, name: str, value: float = 1, asset: str = ''):
+        with self._lock:
+            self.counters[name, asset] = self.counters.get((name, asset), 0) + value
+
+    def table(self):
+        """
+        Long-form DataFrame of every stage and counter: Metric, Frequency, Asset, Value, Unit and,
+        for stages, the peak memory when they ended. Stages with no asset cover all assets;
+        counters with no asset are run totals.
+        """
+        import pandas as pd
+
+        rows = [(s['stage'], s['frequency'], s['asset'], s['seconds'], 's', s['peak_memory_mb'])
+                for s in self.stages]
+        rows += [(name, '', asset, value, COUNTER_UNITS.get(name, 'count'), None)
+                 for (name, asset), value in sorted(self.counters.items())]
+        rows.append(('peak memory', '', '', peak_memory_mb(), 'MB', None))
+        return pd.DataFrame(rows, columns=['Metric', 'Frequency', 'Asset', 'Value', 'Unit', 'Peak Memory (MB)'])
+
+    def write_log(self, path: str) -> list:
+        """
+        Save the run as <path>.json (stages, counters, peak memory) and <path>.csv (table()).
+        Returns the two paths.
+        """
+        log = {
+            'started': self.started.isoformat(timespec='seconds'),
+            'finished': datetime.datetime.now().isoformat(timespec='seconds'),
+            'peak_memory_mb': peak_memory_mb(),
+            'stages': self.stages,
+            'counters': [{'name': name, 'asset': asset, 'value': value}
+                         for (name, asset), value in sorted(self.counters.items())],
+        }
+        with open(f"{path}.json", 'w') as f:
+            json.dump(log, f, indent=1)
+        self.table().to_csv(f"{path}.csv", index=False)
+        return [f"{path}.json", f"{path}.csv"]
+
+
+@contextlib.contextmanager
+def recording(stats: RunStats):
+    """
+    Make stats the active RunStats for the duration of the block (None records nothing).
+    """
+    global _active
+    previous, _active = _active, stats
+    try:
+        yield stats
+    finally:
+        _active = previous
+
+
+def active():
+    return _active
+
+
+@contextlib.contextmanager
+def scope(frequency: str):
+    """
+    Stages recorded inside the block default to this frequency.
+    """
+    stats = _active
+    if stats is None:
+        yield
+        return
+    previous, stats.frequency = stats.frequency, frequency
+    try:
+        yield
+    finally:
+        stats.frequency = previous
+
+
+def stage(name: str, frequency: str = None, asset: str = ''):
+    """
+    Context manager timing a stage on the active RunStats; does nothing when none is active.
+    """
+    return _active.stage(name, frequency, asset) if _active is not None else contextlib.nullcontext()
+
+
+def count(name: str, value: float = 1, asset: str = ''):
+    if _active is not None:
+        _active.count(name, value, asset)
+
+
+def fetched(asset: str, bars):
+    """
+    Count bars received from the network for asset: a list of OHLCV rows or a DataFrame.
+    """
+    if _active is None:
+        return
+    if hasattr(bars, 'to_json'):
+        size = len(bars.to_json(orient='values', date_format='epoch'))
+    else:
+        size = len(json.dumps(bars))
+    _active.count('bars fetched', len(bars), asset)
+    _active.count('bytes fetched', size, asset)
+
+
+@contextlib.contextmanager
+def profiled(path: str, top: int = 25):
+    """
+    Run the block under cProfile, dump the stats to path (for snakeviz, pstats, ...) and print
+    the `top` functions by cumulative time.
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)